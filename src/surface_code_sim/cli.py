@@ -1,64 +1,278 @@
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from functools import lru_cache, partial
 from itertools import product
 from pathlib import Path
 from typing import Iterable
 
-import pandas as pd
 import typer
 
 from surface_code_sim.decoders import LocalDecoder, MwpmDecoder
-from surface_code_sim.qiskit_frontend import SampledSyndromes, sample_syndromes
-from surface_code_sim.stim_backend import sample_syndromes_stim
+from surface_code_sim.qiskit_frontend import (
+    SampledSyndromes,
+    sample_syndromes,
+    sample_syndromes_batch,
+)
+from surface_code_sim.stim_backend import sample_detections_stim, sample_syndromes_stim
 from surface_code_sim.utils import (
     ALLOWED_BACKENDS,
+    ALLOWED_CI_METHODS,
     ALLOWED_DECODERS,
+    ALLOWED_EXECUTORS,
+    ALLOWED_OUTPUT_FORMATS,
     ExperimentConfig,
     NoiseParams,
     RunMetadata,
+    RunOptions,
     make_csv_row,
     resolve_git_sha,
 )
-from surface_code_sim.plotting import bootstrap_ci
+from surface_code_sim.plotting import binomial_ci
+from surface_code_sim.results import ResultWriter, compact_results, completed_fingerprints
+from surface_code_sim.streaming import adaptive_failures, failure_counts, stream_failures
+from surface_code_sim.syndrome_cache import SyndromeCache, syndrome_key
+from surface_code_sim.syndrome_file import SyndromeFile, write_syndrome_file
 
 app = typer.Typer(add_completion=False)
 
 
-def _decoder_factory(name: str, distance: int):
+def _decoder_factory(name: str, config: ExperimentConfig, options: RunOptions):
+    # One decoder instance, syndrome cache included, serves every chunk and sweep point
+    # that shares a circuit.
+    return _cached_decoder(
+        name,
+        config.backend,
+        config.distance,
+        config.rounds,
+        config.noise.fingerprint(),
+        options.decode_workers,
+        options.decode_cache_size,
+    )
+
+
+@lru_cache(maxsize=64)
+def _cached_decoder(
+    name: str,
+    backend: str,
+    distance: int,
+    rounds: int,
+    noise_key: tuple,
+    workers: int,
+    cache_size: int,
+):
     if name == "local":
         return LocalDecoder()
     if name == "mwpm":
-        return MwpmDecoder.from_distance(distance)
+        # Stim circuits carry detector annotations, so match on their error model; Aer
+        # syndromes fall back to per-basis boundary matching.
+        if backend == "stim":
+            return MwpmDecoder.from_stim_memory(
+                distance, rounds, NoiseParams(*noise_key), workers=workers, cache_size=cache_size
+            )
+        return MwpmDecoder.from_distance(distance, workers=workers)
     raise ValueError(f"Unknown decoder {name}")
 
 
-def _sample(config: ExperimentConfig) -> SampledSyndromes:
+def _sample(config: ExperimentConfig, options: RunOptions) -> SampledSyndromes:
+    if options.syndrome_cache is None:
+        return _sample_backend(config, options)
+    cache = SyndromeCache(Path(options.syndrome_cache), max_bytes=options.syndrome_cache_mb * 2**20)
+    sample_fn = partial(_sample_backend, options=options)
+    return cache.fetch(
+        config,
+        sample_fn,
+        packed=options.packed,
+        counts=options.aer_counts,
+        stim_detectors=options.stim_detectors,
+    )
+
+
+def _sample_backend(config: ExperimentConfig, options: RunOptions) -> SampledSyndromes:
     if config.backend == "aer":
-        return sample_syndromes(config)
+        return sample_syndromes(config, packed=options.packed, counts=options.aer_counts)
+    if config.backend == "stim" and options.stim_detectors:
+        return sample_detections_stim(config, packed=options.packed)
     if config.backend == "stim":
-        return sample_syndromes_stim(config)
+        return sample_syndromes_stim(config, packed=options.packed)
     raise ValueError(f"Unknown backend {config.backend}")
 
 
-def _run_once(cfg: ExperimentConfig, git_sha: str, run_id: str) -> dict:
+def _sample_detections(config: ExperimentConfig, options: RunOptions) -> SampledSyndromes:
+    # Decoders only read detection events, so reuse the raw buffers for them.
+    return _sample(config, options).drop_measurements()
+
+
+class _RunDecoder:
+    # Sums the per-call cache counters of one run. Decoders are shared across threads, so
+    # the decoder's own running totals would mix in concurrent runs.
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.cache_served = 0
+        self.cache_shots = 0
+
+    def decode(self, syndromes: SampledSyndromes) -> dict:
+        decoded = self.decoder.decode(syndromes)
+        self.cache_served += decoded.get("cache_served", 0)
+        self.cache_shots += decoded.get("cache_shots", 0)
+        return decoded
+
+    @property
+    def cache_hit_rate(self) -> float | None:
+        return self.cache_served / self.cache_shots if self.cache_shots else None
+
+
+def _run_once(
+    cfg: ExperimentConfig,
+    git_sha: str,
+    run_id: str,
+    options: RunOptions | None = None,
+    syndromes: SampledSyndromes | None = None,
+) -> dict:
+    options = options or RunOptions()
+    fingerprint = cfg.fingerprint(git_sha)
     start = time.time()
-    syndromes = _sample(cfg)
-    decoder_instance = _decoder_factory(cfg.decoder, cfg.distance)
-    decoded = decoder_instance.decode(syndromes)
+    decoder_instance = _RunDecoder(_decoder_factory(cfg.decoder, cfg, options))
+    sample_fn = partial(_sample_detections, options=options)
+    if syndromes is None and options.adaptive:
+        # --shots sets the chunk size unless --chunk-shots is given; the row records the
+        # shots actually drawn.
+        failures, shots = adaptive_failures(
+            cfg,
+            decoder_instance,
+            options.chunk_shots or cfg.shots,
+            sample_fn,
+            max_shots=options.max_shots,
+            target_rel_ci=options.target_rel_ci,
+            min_failures=options.min_failures,
+            ci_method=options.ci_method,
+        )
+        cfg = replace(cfg, shots=shots)
+    elif syndromes is None and _streams(cfg, options):
+        failures, shots = stream_failures(cfg, decoder_instance, options.chunk_shots, sample_fn)
+    else:
+        if syndromes is None:
+            syndromes = _sample_detections(cfg, options)
+        else:
+            syndromes = syndromes.drop_measurements()
+        failures, shots = failure_counts(decoder_instance.decode(syndromes), syndromes)
     wall = time.time() - start
-    logical_errors = ((decoded["x_logical"] | decoded["z_logical"]) != 0).astype(int)
-    logical_error_rate = float(logical_errors.mean())
-    ci_low, ci_high = bootstrap_ci(logical_errors, num_samples=1000, alpha=0.05, seed=cfg.seed) if len(logical_errors) > 1 else (None, None)
-    meta = RunMetadata(run_id=run_id, git_sha=git_sha, command="cli sweep", seed=cfg.seed)
+    hit_rate = decoder_instance.cache_hit_rate
+    return _result_row(cfg, git_sha, run_id, options, failures, shots, wall, hit_rate, fingerprint)
+
+
+def _result_row(
+    cfg: ExperimentConfig,
+    git_sha: str,
+    run_id: str,
+    options: RunOptions,
+    failures: int,
+    shots: int,
+    wall: float,
+    hit_rate: float | None,
+    fingerprint: str,
+    command: str = "cli sweep",
+) -> dict:
+    # Every path reduces to a failure count, so the interval costs the same at any shot count.
+    ci_low, ci_high = (None, None)
+    if shots > 1:
+        ci_low, ci_high = binomial_ci(failures, shots, method=options.ci_method, seed=cfg.seed)
+    meta = RunMetadata(run_id=run_id, git_sha=git_sha, command=command, seed=cfg.seed)
     return make_csv_row(
         metadata=meta,
         config=cfg,
-        logical_error_rate=logical_error_rate,
+        logical_error_rate=failures / shots,
         ci_low=ci_low,
         ci_high=ci_high,
         wall_time_seconds=wall,
+        decode_cache_hit_rate=hit_rate,
+        config_fingerprint=fingerprint,
+    )
+
+
+def _streams(cfg: ExperimentConfig, options: RunOptions) -> bool:
+    return options.adaptive or (options.chunk_shots is not None and options.chunk_shots < cfg.shots)
+
+
+def _run_point(
+    cfgs: list[ExperimentConfig],
+    git_sha: str,
+    run_ids: list[str],
+    options: RunOptions,
+    syndromes: SampledSyndromes | None = None,
+) -> list[dict]:
+    # Every decoder on a sweep point decodes one shared sample, so decoders are compared on
+    # identical shots. Streamed runs sample per chunk and keep sampling per decoder.
+    if len(cfgs) > 1 and syndromes is None and not _streams(cfgs[0], options):
+        start = time.time()
+        syndromes = _sample_detections(cfgs[0], options)
+        sample_share = (time.time() - start) / len(cfgs)
+    else:
+        sample_share = 0.0
+    if syndromes is not None:
+        # Convert once up front so decoders running in threads never race on the buffers.
+        syndromes = syndromes.drop_measurements()
+    rows = []
+    for cfg, run_id in zip(cfgs, run_ids, strict=True):
+        row = _run_once(cfg, git_sha, run_id, options, syndromes)
+        row["wall_time_seconds"] += sample_share
+        rows.append(row)
+    return rows
+
+
+def _sample_groups(configs: list[ExperimentConfig], options: RunOptions) -> list[list[int]]:
+    groups: dict[str, list[int]] = {}
+    for pos, cfg in enumerate(configs):
+        key = syndrome_key(cfg, options.packed, options.aer_counts, options.stim_detectors)
+        groups.setdefault(key, []).append(pos)
+    return list(groups.values())
+
+
+def _sweep_tasks(
+    groups: list[list[int]], configs: list[ExperimentConfig], options: RunOptions
+) -> list[list[int]]:
+    # A task is one sweep point, or with --aer-batch every Aer point that can share one
+    # simulator call (same noise model and shot count).
+    if not options.aer_batch:
+        return [[idx] for idx in range(len(groups))]
+    tasks: dict[object, list[int]] = {}
+    for idx, group in enumerate(groups):
+        cfg = configs[group[0]]
+        key = (cfg.noise.fingerprint(), cfg.shots) if cfg.backend == "aer" else idx
+        tasks.setdefault(key, []).append(idx)
+    return list(tasks.values())
+
+
+def _run_task(
+    points: list[list[ExperimentConfig]],
+    git_sha: str,
+    run_ids: list[list[str]],
+    options: RunOptions,
+) -> list[dict]:
+    if not (options.aer_batch and points[0][0].backend == "aer"):
+        return [
+            row
+            for cfgs, ids in zip(points, run_ids, strict=True)
+            for row in _run_point(cfgs, git_sha, ids, options)
+        ]
+    # The batch is sampled inside the worker, so samples are never pickled between processes
+    # and each is released once its point is decoded. Rows keep their configured seed and
+    # record the seed Aer derived for their experiment.
+    start = time.time()
+    batched = sample_syndromes_batch(
+        [cfgs[0] for cfgs in points], packed=options.packed, counts=options.aer_counts
     )
+    sample_share = (time.time() - start) / sum(len(cfgs) for cfgs in points)
+    rows = []
+    for idx, (cfgs, ids) in enumerate(zip(points, run_ids, strict=True)):
+        aer_seed, syndromes = batched[idx]
+        batched[idx] = None
+        for row in _run_point(cfgs, git_sha, ids, options, syndromes):
+            row["wall_time_seconds"] += sample_share
+            row["aer_seed"] = aer_seed
+            rows.append(row)
+    return rows
 
 
 def _noise_model(px: float | None, py: float | None, pz: float | None) -> str:
@@ -82,7 +296,11 @@ def _sweep_configs(
 ) -> list[ExperimentConfig]:
     configs: list[ExperimentConfig] = []
     noise_model = _noise_model(px, py, pz)
-    seed_offset = 0
+    distances, backends, p_values = list(distances), list(backends), list(p_values)
+    # Seeds follow the sampling point rather than the decoder, so every decoder on a point
+    # sees the same syndromes; with one decoder this is the old running offset.
+    points = product(distances, backends, p_values)
+    point_seeds = {point: base_seed + offset for offset, point in enumerate(points)}
     for distance, backend, decoder, p_val in product(distances, backends, decoders, p_values):
         noise = NoiseParams(
             model=noise_model,
@@ -101,13 +319,27 @@ def _sweep_configs(
             noise=noise,
             decoder=decoder,
             backend=backend,
-            seed=base_seed + seed_offset,
+            seed=point_seeds[distance, backend, p_val],
         )
         configs.append(cfg)
-        seed_offset += 1
     return configs
 
 
+def _check_stim_detectors(decoders: Iterable[str], stim_detectors: bool) -> None:
+    # Native sampling has no detector for the first X round, so it reports that round as
+    # quiet where the measurement path reports the raw outcomes. Only MWPM, which decodes
+    # the detectors themselves, gives the same result either way.
+    if stim_detectors and any(name != "mwpm" for name in decoders):
+        raise ValueError("stim_detectors samples can only be decoded with mwpm")
+
+
+def _make_executor(kind: str, jobs: int) -> Executor:
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=jobs)
+    # Worker processes live for the whole sweep, so module-level caches stay warm across configs.
+    return ProcessPoolExecutor(max_workers=jobs)
+
+
 def run_sweep(
     distance: list[int],
     rounds: int,
@@ -126,8 +358,44 @@ def run_sweep(
     output: Path = Path("experiments") / "runs.csv",
     git_sha: str | None = None,
     run_prefix: str | None = None,
+    packed: bool = False,
+    chunk_shots: int | None = None,
+    executor: str = "process",
+    decode_workers: int = 1,
+    aer_counts: bool = False,
+    decode_cache_size: int = 0,
+    aer_batch: bool = False,
+    target_rel_ci: float | None = None,
+    min_failures: int | None = None,
+    max_shots: int | None = None,
+    ci_method: str = "wilson",
+    output_format: str = "csv",
+    resume: bool = False,
+    syndrome_cache: Path | None = None,
+    syndrome_cache_mb: int = 1024,
+    stim_detectors: bool = False,
 ):
+    if executor not in ALLOWED_EXECUTORS:
+        raise ValueError(f"executor must be one of {ALLOWED_EXECUTORS}")
+    if output_format not in ALLOWED_OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {ALLOWED_OUTPUT_FORMATS}")
+    _check_stim_detectors(decoder, stim_detectors)
     git_sha = git_sha or resolve_git_sha()
+    options = RunOptions(
+        packed=packed,
+        chunk_shots=chunk_shots,
+        decode_workers=decode_workers,
+        aer_counts=aer_counts,
+        decode_cache_size=decode_cache_size,
+        aer_batch=aer_batch,
+        target_rel_ci=target_rel_ci,
+        min_failures=min_failures,
+        max_shots=max_shots,
+        ci_method=ci_method,
+        syndrome_cache=None if syndrome_cache is None else str(syndrome_cache),
+        syndrome_cache_mb=syndrome_cache_mb,
+        stim_detectors=stim_detectors,
+    )
     run_prefix = run_prefix or f"run-{uuid.uuid4().hex[:6]}"
     configs = _sweep_configs(
         distances=distance,
@@ -144,31 +412,43 @@ def run_sweep(
         readout_error_1to0=readout_error_1to0,
         base_seed=seed,
     )
-    output.parent.mkdir(parents=True, exist_ok=True)
-    rows: list[dict] = []
-    if jobs == 1:
-        for idx, cfg in enumerate(configs):
-            run_id = f"{run_prefix}-{idx:04d}"
-            rows.append(_run_once(cfg, git_sha, run_id))
-    else:
-        with ThreadPoolExecutor(max_workers=jobs) as pool:
-            futures = []
-            for idx, cfg in enumerate(configs):
-                run_id = f"{run_prefix}-{idx:04d}"
-                futures.append(pool.submit(_run_once, cfg, git_sha, run_id))
-            for fut in futures:
-                rows.append(fut.result())
-    df = pd.DataFrame(rows)
-    header = not output.exists()
-    df.to_csv(output, mode="a", header=header, index=False)
-    typer.echo(f"Wrote {len(rows)} rows to {output}")
+    fingerprints = [cfg.fingerprint(git_sha) for cfg in configs]
+    pending = list(range(len(configs)))
+    if resume:
+        finished = completed_fingerprints(output, output_format)
+        pending = [idx for idx in pending if fingerprints[idx] not in finished]
+        if len(pending) < len(configs):
+            typer.echo(f"Skipping {len(configs) - len(pending)} configs already in {output}")
+    pending_configs = [configs[idx] for idx in pending]
+    groups = _sample_groups(pending_configs, options)
+    work = []
+    for task in _sweep_tasks(groups, pending_configs, options):
+        points = [[pending_configs[pos] for pos in groups[idx]] for idx in task]
+        run_ids = [[f"{run_prefix}-{pending[pos]:04d}" for pos in groups[idx]] for idx in task]
+        work.append((points, run_ids))
+    # Rows are written as their task finishes; resume matches on fingerprints, so a slow
+    # early task never holds back finished rows.
+    with ResultWriter(output, output_format) as writer:
+        if jobs == 1:
+            for points, ids in work:
+                writer.add(_run_task(points, git_sha, ids, options))
+        else:
+            with _make_executor(executor, jobs) as pool:
+                futures = [
+                    pool.submit(_run_task, points, git_sha, ids, options) for points, ids in work
+                ]
+                for fut in as_completed(futures):
+                    writer.add(fut.result())
+    typer.echo(f"Wrote {len(pending)} rows to {output}")
 
 
 @app.command()
 def sweep(
     distance: list[int] = typer.Option([3], "-d", "--distance", help="Code distance; can repeat for sweep"),
     rounds: int = typer.Option(..., help="Number of stabilizer measurement rounds"),
-    shots: int = typer.Option(..., help="Number of shots"),
+    shots: int = typer.Option(
+        ..., help="Shots per point; with adaptive sampling, the chunk size unless --chunk-shots"
+    ),
     backend: list[str] = typer.Option(["aer"], help=f"Backend: {ALLOWED_BACKENDS}"),
     decoder: list[str] = typer.Option(["mwpm"], help=f"Decoder: {ALLOWED_DECODERS}"),
     p: list[float] = typer.Option([0.0], help="Depolarizing probability p; can repeat"),
@@ -180,9 +460,52 @@ def sweep(
     readout_error_1to0: float = typer.Option(None, help="Asymmetric readout flip 1->0"),
     seed: int = typer.Option(0, help="Base seed"),
     jobs: int = typer.Option(1, help="Parallel workers"),
-    output: Path = typer.Option(Path("experiments") / "runs.csv", help="CSV output path"),
+    executor: str = typer.Option(
+        "process", help=f"Worker pool for --jobs > 1: {ALLOWED_EXECUTORS}"
+    ),
+    output: Path = typer.Option(
+        Path("experiments") / "runs.csv",
+        help="CSV file, or Parquet store directory with --format parquet",
+    ),
     git_sha: str = typer.Option("unknown", help="Git short SHA for provenance"),
     run_prefix: str = typer.Option(None, help="Prefix for run_id values"),
+    packed: bool = typer.Option(False, help="Store syndromes bit-packed (one bit per measurement)"),
+    chunk_shots: int = typer.Option(None, help="Sample and decode in chunks of this many shots"),
+    decode_workers: int = typer.Option(1, help="Processes used to decode each MWPM batch"),
+    aer_counts: bool = typer.Option(
+        False, help="Sample Aer as outcome counts and decode each distinct syndrome once"
+    ),
+    decode_cache_size: int = typer.Option(
+        0, help="Distinct MWPM syndromes memoized per decoder; 0 (the default) disables"
+    ),
+    aer_batch: bool = typer.Option(
+        False, help="Sample all Aer configs sharing a noise model in one simulator call"
+    ),
+    target_rel_ci: float = typer.Option(
+        None, help="Keep sampling until the CI width over the rate drops below this"
+    ),
+    min_failures: int = typer.Option(
+        None, help="Keep sampling until this many logical failures are seen"
+    ),
+    max_shots: int = typer.Option(None, help="Shot budget per point for adaptive sampling"),
+    ci_method: str = typer.Option(
+        "wilson", help=f"Confidence interval for the logical error rate: {ALLOWED_CI_METHODS}"
+    ),
+    output_format: str = typer.Option(
+        "csv",
+        "--format",
+        help=f"Result format {ALLOWED_OUTPUT_FORMATS}; parquet writes a partitioned directory",
+    ),
+    resume: bool = typer.Option(False, help="Skip configs whose rows are already in the output"),
+    syndrome_cache: Path = typer.Option(
+        None, help="Directory for sampled syndromes shared across decoders and reruns"
+    ),
+    syndrome_cache_mb: int = typer.Option(
+        1024, help="Size limit of the syndrome cache before LRU eviction"
+    ),
+    stim_detectors: bool = typer.Option(
+        False, help="Sample Stim detection events directly instead of measurements; mwpm only"
+    ),
 ):
     run_sweep(
         distance=distance,
@@ -202,9 +525,170 @@ def sweep(
         output=output,
         git_sha=git_sha,
         run_prefix=run_prefix,
+        packed=packed,
+        chunk_shots=chunk_shots,
+        executor=executor,
+        decode_workers=decode_workers,
+        aer_counts=aer_counts,
+        decode_cache_size=decode_cache_size,
+        aer_batch=aer_batch,
+        target_rel_ci=target_rel_ci,
+        min_failures=min_failures,
+        max_shots=max_shots,
+        ci_method=ci_method,
+        output_format=output_format,
+        resume=resume,
+        syndrome_cache=syndrome_cache,
+        syndrome_cache_mb=syndrome_cache_mb,
+        stim_detectors=stim_detectors,
     )
 
 
+@app.command()
+def sample(
+    output: Path = typer.Option(..., help="Syndrome file to write"),
+    distance: int = typer.Option(3, "-d", "--distance", help="Code distance"),
+    rounds: int = typer.Option(..., help="Number of stabilizer measurement rounds"),
+    shots: int = typer.Option(..., help="Number of shots"),
+    backend: str = typer.Option("stim", help=f"Backend: {ALLOWED_BACKENDS}"),
+    p: float = typer.Option(0.0, help="Depolarizing probability p"),
+    px: float = typer.Option(None, help="Biased Pauli px"),
+    py: float = typer.Option(None, help="Biased Pauli py"),
+    pz: float = typer.Option(None, help="Biased Pauli pz"),
+    readout_error: float = typer.Option(0.0, help="Symmetric readout flip probability"),
+    readout_error_0to1: float = typer.Option(None, help="Asymmetric readout flip 0->1"),
+    readout_error_1to0: float = typer.Option(None, help="Asymmetric readout flip 1->0"),
+    seed: int = typer.Option(0, help="Seed"),
+    chunk_shots: int = typer.Option(65536, help="Shots sampled and written per chunk"),
+    stim_detectors: bool = typer.Option(
+        False, help="Sample Stim detection events directly instead of measurements; mwpm only"
+    ),
+):
+    (cfg,) = _sweep_configs(
+        distances=[distance],
+        p_values=[p],
+        backends=[backend],
+        decoders=["mwpm"],
+        rounds=rounds,
+        shots=shots,
+        px=px,
+        py=py,
+        pz=pz,
+        readout_error=readout_error,
+        readout_error_0to1=readout_error_0to1,
+        readout_error_1to0=readout_error_1to0,
+        base_seed=seed,
+    )
+    options = RunOptions(packed=True, stim_detectors=stim_detectors)
+    sample_fn = partial(_sample_detections, options=options)
+    write_syndrome_file(output, cfg, chunk_shots, sample_fn, stim_detectors=stim_detectors)
+    typer.echo(f"Wrote {shots} shots to {output}")
+
+
+def decode_file(
+    path: Path,
+    decoders: Iterable[str],
+    output: Path,
+    chunk_shots: int = 65536,
+    git_sha: str | None = None,
+    run_prefix: str | None = None,
+    output_format: str = "csv",
+    decode_workers: int = 1,
+    decode_cache_size: int = 0,
+    ci_method: str = "wilson",
+) -> list[dict]:
+    git_sha = git_sha or resolve_git_sha()
+    run_prefix = run_prefix or f"decode-{uuid.uuid4().hex[:6]}"
+    options = RunOptions(
+        packed=True,
+        decode_workers=decode_workers,
+        decode_cache_size=decode_cache_size,
+        ci_method=ci_method,
+    )
+    syndrome_file = SyndromeFile(path)
+    decoders = list(decoders)
+    _check_stim_detectors(decoders, syndrome_file.header.get("stim_detectors", False))
+    rows = []
+    with ResultWriter(output, output_format) as writer:
+        for idx, name in enumerate(decoders):
+            cfg = syndrome_file.config(decoder=name)
+            start = time.time()
+            decoder_instance = _RunDecoder(_decoder_factory(name, cfg, options))
+            failures = shots = 0
+            for chunk in syndrome_file.iter_chunks(chunk_shots):
+                chunk_failures, chunk_total = failure_counts(decoder_instance.decode(chunk), chunk)
+                failures += chunk_failures
+                shots += chunk_total
+            wall = time.time() - start
+            hit_rate = decoder_instance.cache_hit_rate
+            run_id = f"{run_prefix}-{idx:04d}"
+            fingerprint = cfg.fingerprint(git_sha)
+            row = _result_row(
+                cfg,
+                git_sha,
+                run_id,
+                options,
+                failures,
+                shots,
+                wall,
+                hit_rate,
+                fingerprint,
+                "cli decode",
+            )
+            writer.add([row])
+            rows.append(row)
+    return rows
+
+
+@app.command()
+def decode(
+    path: Path = typer.Argument(..., help="Syndrome file written by `sample`"),
+    decoder: list[str] = typer.Option(["mwpm"], help=f"Decoder: {ALLOWED_DECODERS}; can repeat"),
+    output: Path = typer.Option(
+        Path("experiments") / "runs.csv",
+        help="CSV file, or Parquet store directory with --format parquet",
+    ),
+    chunk_shots: int = typer.Option(65536, help="Shots decoded per chunk"),
+    git_sha: str = typer.Option("unknown", help="Git short SHA for provenance"),
+    run_prefix: str = typer.Option(None, help="Prefix for run IDs"),
+    output_format: str = typer.Option(
+        "csv", "--format", help=f"Result format {ALLOWED_OUTPUT_FORMATS}"
+    ),
+    decode_workers: int = typer.Option(1, help="Processes used to decode each MWPM batch"),
+    decode_cache_size: int = typer.Option(
+        0, help="Distinct MWPM syndromes memoized per decoder; 0 (the default) disables"
+    ),
+    ci_method: str = typer.Option(
+        "wilson", help=f"Confidence interval for the logical error rate: {ALLOWED_CI_METHODS}"
+    ),
+):
+    rows = decode_file(
+        path,
+        decoders=decoder,
+        output=output,
+        chunk_shots=chunk_shots,
+        git_sha=git_sha,
+        run_prefix=run_prefix,
+        output_format=output_format,
+        decode_workers=decode_workers,
+        decode_cache_size=decode_cache_size,
+        ci_method=ci_method,
+    )
+    typer.echo(f"Wrote {len(rows)} rows to {output}")
+
+
+@app.command()
+def compact(
+    output: Path = typer.Argument(
+        ..., help="Parquet store directory written with --format parquet"
+    ),
+):
+    # Sweeps write one small file per partition per task; this merges them once no sweep is
+    # writing to the store.
+    written = compact_results(output)
+    typer.echo(f"Compacted {len(written)} partitions in {output}")
+
+
 def main():
     app()
 
@@ -1,4 +1,11 @@
+from surface_code_sim.decoders.cache import DecodeCache
 from surface_code_sim.decoders.local import LocalDecoder
-from surface_code_sim.decoders.mwpm import MwpmDecoder
+from surface_code_sim.decoders.mwpm import MwpmDecoder, clear_matching_cache, matching_cache_info
 
-__all__ = ["LocalDecoder", "MwpmDecoder"]
+__all__ = [
+    "DecodeCache",
+    "LocalDecoder",
+    "MwpmDecoder",
+    "clear_matching_cache",
+    "matching_cache_info",
+]
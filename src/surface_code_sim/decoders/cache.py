@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+import numpy as np
+
+from surface_code_sim.qiskit_frontend.sampler import pack_bits
+
+Predictor = Callable[[np.ndarray], np.ndarray]
+
+
+def _row_keys(rows: np.ndarray) -> np.ndarray:
+    # One opaque scalar per row, so rows sort, deduplicate and convert to dict keys in numpy.
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.shape[1]))).reshape(-1)
+
+
+class DecodeCache:
+    # The hit rate is the fraction of shots answered without running the matcher: shots
+    # with no detection events, repeats within a batch, and rows found in the LRU table.
+    def __init__(self, max_entries: int = 65536):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        # Decoders are shared across sweep threads, so the table and counters sit behind a lock.
+        self._lock = threading.Lock()
+        self.served = 0
+        self.shots = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float | None:
+        return self.served / self.shots if self.shots else None
+
+    def stats(self) -> tuple[int, int]:
+        with self._lock:
+            return self.served, self.shots
+
+    def decode(
+        self, detectors: np.ndarray, packed: bool, width: int, predict: Predictor
+    ) -> tuple[np.ndarray, int, int]:
+        # ``predict`` always receives bit-packed rows. Returns the predictions and the
+        # (served, shots) counts of this batch.
+        rows = detectors if packed else pack_bits(detectors)
+        predictions = np.zeros((rows.shape[0], width), dtype=np.uint8)
+        nontrivial = rows.any(axis=1)
+        unique, inverse = np.unique(_row_keys(rows[nontrivial]), return_inverse=True)
+        keys = unique.tolist()
+        with self._lock:
+            cached = [self._entries.get(key) for key in keys]
+            found = [idx for idx, value in enumerate(cached) if value is not None]
+            for idx in found:
+                self._entries.move_to_end(keys[idx])
+        unique_predictions = np.empty((len(keys), width), dtype=np.uint8)
+        if found:
+            values = b"".join(cached[idx] for idx in found)
+            unique_predictions[found] = np.frombuffer(values, dtype=np.uint8).reshape(-1, width)
+        missing = [idx for idx, value in enumerate(cached) if value is None]
+        if missing:
+            rows_missing = unique[missing].view(np.uint8).reshape(len(missing), -1)
+            decoded = np.asarray(predict(rows_missing), dtype=np.uint8)
+            unique_predictions[missing] = decoded
+            # Only the newest max_entries rows of a batch can survive eviction anyway.
+            keep = slice(max(0, len(missing) - self.max_entries), None)
+            new_keys = [keys[idx] for idx in missing[keep]]
+            with self._lock:
+                self._entries.update(zip(new_keys, _row_keys(decoded[keep]).tolist(), strict=True))
+                for _ in range(len(self._entries) - self.max_entries):
+                    self._entries.popitem(last=False)
+        predictions[nontrivial] = unique_predictions[inverse.reshape(-1)]
+        served = rows.shape[0] - len(missing)
+        with self._lock:
+            self.served += served
+            self.shots += rows.shape[0]
+        return predictions, served, rows.shape[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.served = 0
+            self.shots = 0
@@ -1,8 +1,34 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+
 import numpy as np
 import pymatching
+import stim
 
+from surface_code_sim.decoders.cache import DecodeCache
 from surface_code_sim.qiskit_frontend.layout import RotatedCodeLayout, build_layout
-from surface_code_sim.qiskit_frontend.sampler import SampledSyndromes
+from surface_code_sim.qiskit_frontend.sampler import (
+    PACK_BLOCK_SHOTS,
+    SampledSyndromes,
+    pack_bits,
+    unpack_bits,
+)
+from surface_code_sim.stim_backend.circuit import cached_stim_memory_circuit
+from surface_code_sim.utils import ExperimentConfig, NoiseParams
+
+_BYTE_PARITY = (
+    np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1) % 2
+).astype(np.uint8)
+
+
+_BUILD_SECONDS = {"boundary": 0.0, "dem": 0.0}
 
 
 def _build_boundary_matching(detector_count: int) -> pymatching.Matching:
@@ -14,27 +40,222 @@ def _build_boundary_matching(detector_count: int) -> pymatching.Matching:
     return m
 
 
+@lru_cache(maxsize=64)
+def _boundary_matching(detector_count: int) -> pymatching.Matching:
+    start = time.perf_counter()
+    matching = _build_boundary_matching(detector_count)
+    _BUILD_SECONDS["boundary"] += time.perf_counter() - start
+    return matching
+
+
+def _matching_from_circuit(circuit: stim.Circuit) -> pymatching.Matching:
+    dem = circuit.detector_error_model(decompose_errors=True)
+    return pymatching.Matching.from_detector_error_model(dem)
+
+
+@lru_cache(maxsize=32)
+def _dem_matching(distance: int, rounds: int, noise_key: tuple) -> pymatching.Matching:
+    start = time.perf_counter()
+    circuit, _, _ = cached_stim_memory_circuit(distance, rounds, NoiseParams(*noise_key))
+    matching = _matching_from_circuit(circuit)
+    _BUILD_SECONDS["dem"] += time.perf_counter() - start
+    return matching
+
+
+def matching_cache_info() -> dict:
+    info = {}
+    for name, cached in (("boundary", _boundary_matching), ("dem", _dem_matching)):
+        stats = cached.cache_info()
+        info[name] = {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "size": stats.currsize,
+            "build_seconds": _BUILD_SECONDS[name],
+        }
+    return info
+
+
+def clear_matching_cache() -> None:
+    _boundary_matching.cache_clear()
+    _dem_matching.cache_clear()
+    for name in _BUILD_SECONDS:
+        _BUILD_SECONDS[name] = 0.0
+
+
+def _logical_parity(detection: np.ndarray, count: int, packed: bool) -> np.ndarray:
+    # ``detection`` is (shots, rounds, checks); the graph has one node per real detector.
+    shots, rounds = detection.shape[:2]
+    matcher = _boundary_matching(rounds * count)
+    if not packed:
+        out = matcher.decode_batch(detection.reshape(shots, -1))
+        return (np.sum(out, axis=1) % 2).astype(np.uint8)
+    # Packed rows pad every round up to a byte, so each block of shots is repacked without
+    # the padding before matching.
+    parity = np.empty(shots, dtype=np.uint8)
+    for start in range(0, shots, PACK_BLOCK_SHOTS):
+        stop = min(start + PACK_BLOCK_SHOTS, shots)
+        rows = pack_bits(unpack_bits(detection[start:stop], count).reshape(stop - start, -1))
+        out = matcher.decode_batch(rows, bit_packed_shots=True, bit_packed_predictions=True)
+        parity[start:stop] = _BYTE_PARITY[np.bitwise_xor.reduce(out, axis=1)]
+    return parity
+
+
+_MIN_SHARD_SHOTS = 4096
+# Keyed by (pid, workers), so forked sweep workers never submit to their parent's pools.
+_POOLS: dict[tuple[int, int], ProcessPoolExecutor] = {}
+# Decoders are shared across sweep threads, so pool creation must not race.
+_POOLS_LOCK = threading.Lock()
+
+
+def _shutdown_pools() -> None:
+    with _POOLS_LOCK:
+        pid = os.getpid()
+        for key in [key for key in _POOLS if key[0] == pid]:
+            _POOLS.pop(key).shutdown(cancel_futures=True)
+
+
+def _decode_pool(workers: int) -> ProcessPoolExecutor:
+    # Pools outlive a single decode call so each worker keeps its cached Matching warm. They
+    # are spawned because decoders run in sweep threads, and are shut down by a
+    # multiprocessing finalizer because sweep worker processes skip atexit hooks and join
+    # their children on exit.
+    with _POOLS_LOCK:
+        key = (os.getpid(), workers)
+        if key not in _POOLS:
+            context = multiprocessing.get_context("spawn")
+            _POOLS[key] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            Finalize(None, _shutdown_pools, exitpriority=100)
+        return _POOLS[key]
+
+
+def _dem_predict(detectors: np.ndarray, matching_key: tuple, packed: bool) -> np.ndarray:
+    return _dem_matching(*matching_key).decode_batch(detectors, bit_packed_shots=packed)
+
+
+def _decode_shard(
+    shm_name: str, shape: tuple, start: int, stop: int, decode: Callable[[np.ndarray], np.ndarray]
+) -> np.ndarray:
+    shm = SharedMemory(name=shm_name)
+    try:
+        rows = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)[start:stop]
+        decoded = decode(rows)
+        del rows
+        return decoded
+    finally:
+        shm.close()
+
+
+def _decode_sharded(
+    rows: np.ndarray, decode: Callable[[np.ndarray], np.ndarray], workers: int
+) -> np.ndarray:
+    # ``decode`` must be picklable and map a block of shots to one output row per shot.
+    shm = SharedMemory(create=True, size=max(rows.nbytes, 1))
+    try:
+        np.ndarray(rows.shape, dtype=np.uint8, buffer=shm.buf)[:] = rows
+        bounds = np.linspace(0, rows.shape[0], workers + 1).astype(int)
+        pool = _decode_pool(workers)
+        futures = [
+            pool.submit(_decode_shard, shm.name, rows.shape, int(start), int(stop), decode)
+            for start, stop in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
+        return np.concatenate([fut.result() for fut in futures])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
 class MwpmDecoder:
-    def __init__(self, layout: RotatedCodeLayout):
+    def __init__(
+        self,
+        layout: RotatedCodeLayout,
+        matching: pymatching.Matching | None = None,
+        matching_key: tuple | None = None,
+        workers: int = 1,
+        cache_size: int = 0,
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
         self.layout = layout
+        self.matching = matching
+        # (distance, rounds, noise fingerprint) lets worker processes rebuild the same graph.
+        self.matching_key = matching_key
+        self.workers = workers
+        self.cache = DecodeCache(cache_size) if cache_size > 0 else None
 
     @classmethod
-    def from_distance(cls, distance: int) -> "MwpmDecoder":
+    def from_distance(cls, distance: int, workers: int = 1) -> "MwpmDecoder":
         layout = build_layout(distance)
-        return cls(layout)
+        return cls(layout, workers=workers)
 
-    def decode(self, syndromes: SampledSyndromes) -> dict:
-        shots = syndromes.x_detection.shape[0]
+    @classmethod
+    def from_circuit(cls, circuit: stim.Circuit, distance: int) -> "MwpmDecoder":
+        return cls(build_layout(distance), _matching_from_circuit(circuit))
 
-        z_detectors = syndromes.z_detection.reshape(shots, -1)
-        x_detectors = syndromes.x_detection.reshape(shots, -1)
+    @classmethod
+    def from_stim_memory(
+        cls,
+        distance: int,
+        rounds: int,
+        noise: NoiseParams,
+        workers: int = 1,
+        cache_size: int = 0,
+    ) -> "MwpmDecoder":
+        key = (distance, rounds, noise.fingerprint())
+        return cls(
+            build_layout(distance),
+            _dem_matching(*key),
+            matching_key=key,
+            workers=workers,
+            cache_size=cache_size,
+        )
 
-        matcher_z = _build_boundary_matching(z_detectors.shape[1])
-        matcher_x = _build_boundary_matching(x_detectors.shape[1])
+    @classmethod
+    def from_config(
+        cls, config: ExperimentConfig, workers: int = 1, cache_size: int = 0
+    ) -> "MwpmDecoder":
+        return cls.from_stim_memory(
+            config.distance, config.rounds, config.noise, workers=workers, cache_size=cache_size
+        )
 
-        z_out = matcher_z.decode_batch(z_detectors)
-        x_out = matcher_x.decode_batch(x_detectors)
+    def cache_stats(self) -> tuple[int, int] | None:
+        return None if self.cache is None else self.cache.stats()
 
-        z_logical = (np.sum(z_out, axis=1) % 2).astype(np.uint8)
-        x_logical = (np.sum(x_out, axis=1) % 2).astype(np.uint8)
+    def decode(self, syndromes: SampledSyndromes) -> dict:
+        if self.matching is not None and syndromes.detectors is not None:
+            return self._decode_detectors(syndromes)
+        z_logical = self._parity(syndromes.z_detection, syndromes.z_count, syndromes.packed)
+        x_logical = self._parity(syndromes.x_detection, syndromes.x_count, syndromes.packed)
         return {"x_logical": x_logical, "z_logical": z_logical}
+
+    def _parity(self, detection: np.ndarray, count: int, packed: bool) -> np.ndarray:
+        decode = partial(_logical_parity, count=count, packed=packed)
+        if self.workers > 1 and detection.shape[0] >= _MIN_SHARD_SHOTS:
+            return _decode_sharded(detection, decode, self.workers)
+        return decode(detection)
+
+    def _decode_detectors(self, syndromes: SampledSyndromes) -> dict:
+        # The memory experiment tracks logical Z, which only X-type errors can flip.
+        if self.cache is None:
+            predicted = self._predict(syndromes.detectors, syndromes.packed)
+        else:
+            width = self.matching.num_fault_ids
+            predicted, served, shots = self.cache.decode(
+                syndromes.detectors,
+                syndromes.packed,
+                width,
+                lambda rows: self._predict(rows, True),
+            )
+        flips = syndromes.observable_flips()[:, 0]
+        x_logical = np.bitwise_xor(predicted[:, 0], flips).astype(np.uint8)
+        decoded = {"x_logical": x_logical, "z_logical": np.zeros_like(x_logical)}
+        if self.cache is not None:
+            # Per-call counters let callers sharing this decoder attribute hits to their run.
+            decoded.update(cache_served=served, cache_shots=shots)
+        return decoded
+
+    def _predict(self, detectors: np.ndarray, packed: bool) -> np.ndarray:
+        sharded = self.workers > 1 and self.matching_key is not None
+        if sharded and detectors.shape[0] >= _MIN_SHARD_SHOTS:
+            decode = partial(_dem_predict, matching_key=self.matching_key, packed=packed)
+            return _decode_sharded(detectors, decode, self.workers)
+        return self.matching.decode_batch(detectors, bit_packed_shots=packed)
@@ -5,10 +5,11 @@ import pandas as pd
 
 from surface_code_sim.cli import _run_once, _sweep_configs
 from surface_code_sim.plotting import logical_error_curve, record_figure_command
+from surface_code_sim.results import save_results
 from surface_code_sim.utils import resolve_git_sha
 
 
-def run_presets():
+def run_presets(output: Path = Path("experiments/presets.csv"), output_format: str = "csv"):
     git_sha = resolve_git_sha()
     prefix = f"preset-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     cmd_log = Path("experiments/run_commands.log")
@@ -49,16 +50,25 @@ def run_presets():
     for idx, cfg in enumerate(dep_configs + biased_configs):
         run_id = f"{prefix}-{idx:04d}"
         rows.append(_run_once(cfg, git_sha, run_id))
+    save_results(rows, output, output_format)
     df = pd.DataFrame(rows)
-    output = Path("experiments/presets.csv")
-    output.parent.mkdir(parents=True, exist_ok=True)
-    header = not output.exists()
-    df.to_csv(output, mode="a", header=header, index=False)
     dep_df = df[df["px"].isna()]
     biased_df = df[df["px"].notna()]
     figs_dir = Path("figs")
-    logical_error_curve(dep_df, distances=[3, 5, 7, 9], output=figs_dir / "preset_dep.png", title="Depolarizing presets", seed=0)
-    logical_error_curve(biased_df, distances=[3, 5, 7, 9], output=figs_dir / "preset_biased.png", title="Biased presets", seed=0)
+    logical_error_curve(
+        dep_df,
+        distances=[3, 5, 7, 9],
+        output=figs_dir / "preset_dep.png",
+        title="Depolarizing presets",
+        seed=0,
+    )
+    logical_error_curve(
+        biased_df,
+        distances=[3, 5, 7, 9],
+        output=figs_dir / "preset_biased.png",
+        title="Biased presets",
+        seed=0,
+    )
     record_figure_command(figs_dir / "preset_dep.png", "python -m surface_code_sim.experiments.presets", 0, Path("experiments/fig_commands.log"), notes="dep presets")
     record_figure_command(figs_dir / "preset_biased.png", "python -m surface_code_sim.experiments.presets", 0, Path("experiments/fig_commands.log"), notes="biased presets")
 
@@ -5,16 +5,102 @@ from typing import Iterable
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from scipy.stats import beta, norm
 
 
-def bootstrap_ci(data: np.ndarray, num_samples: int = 5000, alpha: float = 0.05, seed: int = 0) -> tuple[float, float]:
+def bootstrap_ci(
+    data: np.ndarray,
+    num_samples: int = 5000,
+    alpha: float = 0.05,
+    seed: int = 0,
+    max_bytes: int = 64 * 2**20,
+) -> tuple[float | None, float | None]:
+    data = np.asarray(data)
+    if data.size == 0:
+        return None, None
+    if np.all((data == 0) | (data == 1)):
+        failures = int(np.count_nonzero(data))
+        return binomial_bootstrap_ci(failures, len(data), num_samples, alpha, seed)
+    # Each resampled row costs an int64 index and a gathered value per element, so draw
+    # as many rows at a time as fit in max_bytes.
+    rng = np.random.default_rng(seed)
+    rows_per_block = max(1, max_bytes // (16 * len(data)))
+    samples = np.empty(num_samples)
+    for start in range(0, num_samples, rows_per_block):
+        stop = min(start + rows_per_block, num_samples)
+        draws = rng.choice(data, size=(stop - start, len(data)), replace=True)
+        samples[start:stop] = draws.mean(axis=1)
+    lower = np.quantile(samples, alpha / 2)
+    upper = np.quantile(samples, 1 - alpha / 2)
+    return float(lower), float(upper)
+
+
+def binomial_bootstrap_ci(
+    failures: int, shots: int, num_samples: int = 5000, alpha: float = 0.05, seed: int = 0
+) -> tuple[float | None, float | None]:
+    # Resampling 0/1 data with replacement gives a Binomial(shots, failures / shots) count,
+    # so the bootstrap distribution can be drawn from the counts alone.
+    if shots == 0:
+        return None, None
     rng = np.random.default_rng(seed)
-    samples = rng.choice(data, size=(num_samples, len(data)), replace=True).mean(axis=1)
+    samples = rng.binomial(shots, failures / shots, size=num_samples) / shots
     lower = np.quantile(samples, alpha / 2)
     upper = np.quantile(samples, 1 - alpha / 2)
     return float(lower), float(upper)
 
 
+def _wilson_bounds(failures, shots, alpha: float = 0.05) -> tuple[np.ndarray, np.ndarray]:
+    z = norm.ppf(1 - alpha / 2)
+    rate = failures / shots
+    denom = 1 + z**2 / shots
+    center = (rate + z**2 / (2 * shots)) / denom
+    half = z * np.sqrt(rate * (1 - rate) / shots + z**2 / (4 * shots**2)) / denom
+    # At the extremes center and half cancel only up to rounding, so pin the exact bounds.
+    lower = np.where(failures == 0, 0.0, np.maximum(center - half, 0.0))
+    upper = np.where(failures == shots, 1.0, np.minimum(center + half, 1.0))
+    return lower, upper
+
+
+def wilson_ci(failures: int, shots: int, alpha: float = 0.05) -> tuple[float, float]:
+    lower, upper = _wilson_bounds(failures, shots, alpha=alpha)
+    return float(lower), float(upper)
+
+
+def clopper_pearson_ci(failures: int, shots: int, alpha: float = 0.05) -> tuple[float, float]:
+    lower = beta.ppf(alpha / 2, failures, shots - failures + 1) if failures > 0 else 0.0
+    upper = beta.ppf(1 - alpha / 2, failures + 1, shots - failures) if failures < shots else 1.0
+    return float(lower), float(upper)
+
+
+def binomial_ci(
+    failures: int, shots: int, method: str = "wilson", alpha: float = 0.05, seed: int = 0
+) -> tuple[float | None, float | None]:
+    if method == "wilson":
+        return wilson_ci(failures, shots, alpha=alpha)
+    if method == "clopper-pearson":
+        return clopper_pearson_ci(failures, shots, alpha=alpha)
+    if method == "bootstrap":
+        return binomial_bootstrap_ci(failures, shots, num_samples=1000, alpha=alpha, seed=seed)
+    raise ValueError(f"Unknown CI method {method}")
+
+
+def _row_intervals(rows: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    # Use the interval stored with each run; rows without one get a Wilson interval from
+    # their rate and shot count, and rows with neither are drawn without error bars.
+    ci_low = (
+        rows["ci_low"].to_numpy(dtype=float) if "ci_low" in rows else np.full(len(rows), np.nan)
+    )
+    ci_high = (
+        rows["ci_high"].to_numpy(dtype=float) if "ci_high" in rows else np.full(len(rows), np.nan)
+    )
+    missing = np.isnan(ci_low) | np.isnan(ci_high)
+    if missing.any() and "shots" in rows:
+        shots = rows["shots"].to_numpy(dtype=float)[missing]
+        failures = np.rint(rows["logical_error_rate"].to_numpy(dtype=float)[missing] * shots)
+        ci_low[missing], ci_high[missing] = _wilson_bounds(failures, shots)
+    return ci_low, ci_high
+
+
 def logical_error_curve(
     df: pd.DataFrame,
     distances: Iterable[int],
@@ -23,6 +109,8 @@ def logical_error_curve(
     seed: int = 0,
     x_field: str = "p",
 ):
+    # ``seed`` is accepted for existing callers; the error bars no longer draw bootstrap
+    # samples, so it has no effect.
     fig, ax = plt.subplots()
     for d in distances:
         subset = df[df["distance"] == d]
@@ -31,13 +119,7 @@ def logical_error_curve(
         probs = subset[x_field].to_numpy()
         if len(errs) == 0:
             continue
-        if len(errs) > 1:
-            ci = [bootstrap_ci(errs, seed=seed) for _ in errs]
-            ci_low = [c[0] for c in ci]
-            ci_high = [c[1] for c in ci]
-        else:
-            ci_low = [np.nan]
-            ci_high = [np.nan]
+        ci_low, ci_high = _row_intervals(subset)
         lower = np.maximum(np.array(errs) - np.array(ci_low), 0)
         upper = np.maximum(np.array(ci_high) - np.array(errs), 0)
         ax.errorbar(probs, errs, yerr=[lower, upper], label=f"d={d}", marker="o")
@@ -1,8 +1,12 @@
 import time
 from dataclasses import dataclass
+from functools import partial
 from typing import Callable, Dict, List
 
 from surface_code_sim.cli import _run_once, _sweep_configs
+from surface_code_sim.decoders import matching_cache_info
+from surface_code_sim.qiskit_frontend import aer_cache_info
+from surface_code_sim.stim_backend import circuit_cache_info
 
 
 @dataclass
@@ -36,7 +40,8 @@ def profile_samplers() -> Dict[str, float]:
     results: List[ProfileResult] = []
     for cfg in configs:
         run_id = f"profile-{cfg.backend}-{cfg.distance}"
-        results.append(profile_run(lambda cfg=cfg: _run_once(cfg, git_sha="unknown", run_id=run_id), label=run_id))
+        run = partial(_run_once, cfg, git_sha="unknown", run_id=run_id)
+        results.append(profile_run(run, label=run_id))
     return {r.label: r.duration_seconds for r in results}
 
 
@@ -44,3 +49,6 @@ if __name__ == "__main__":
     times = profile_samplers()
     for label, duration in times.items():
         print(f"{label}: {duration:.3f}s")
+    print(f"stim circuit cache: {circuit_cache_info()}")
+    print(f"matching cache: {matching_cache_info()}")
+    print(f"aer cache: {aer_cache_info()}")
@@ -1,6 +1,22 @@
 from surface_code_sim.qiskit_frontend.circuit import build_memory_circuit
 from surface_code_sim.qiskit_frontend.layout import RotatedCodeLayout, build_layout
 from surface_code_sim.qiskit_frontend.noise import build_noise_model
-from surface_code_sim.qiskit_frontend.sampler import SampledSyndromes, sample_syndromes
+from surface_code_sim.qiskit_frontend.sampler import (
+    SampledSyndromes,
+    aer_cache_info,
+    clear_aer_cache,
+    sample_syndromes,
+    sample_syndromes_batch,
+)
 
-__all__ = ["build_memory_circuit", "RotatedCodeLayout", "build_layout", "build_noise_model", "sample_syndromes", "SampledSyndromes"]
+__all__ = [
+    "build_memory_circuit",
+    "RotatedCodeLayout",
+    "build_layout",
+    "build_noise_model",
+    "sample_syndromes",
+    "sample_syndromes_batch",
+    "SampledSyndromes",
+    "aer_cache_info",
+    "clear_aer_cache",
+]
@@ -1,49 +1,344 @@
+from collections.abc import Callable
+from functools import lru_cache
+
 import numpy as np
-from qiskit import transpile
+from qiskit import QuantumCircuit, transpile
 from qiskit_aer import AerSimulator
+from qiskit_aer.noise import NoiseModel
+
+from surface_code_sim.qiskit_frontend import build_memory_circuit, build_noise_model
+from surface_code_sim.utils import ExperimentConfig, NoiseParams, seed_everything
+
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    return np.packbits(bits, axis=-1, bitorder="little")
+
 
-from surface_code_sim.qiskit_frontend import build_layout, build_memory_circuit, build_noise_model
-from surface_code_sim.utils import ExperimentConfig, seed_everything
+def unpack_bits(packed: np.ndarray, count: int) -> np.ndarray:
+    return np.unpackbits(packed, axis=-1, count=count, bitorder="little")
+
+
+PACK_BLOCK_SHOTS = 65536
+
+
+def pack_in_blocks(
+    shots: int,
+    rounds: int,
+    x_count: int,
+    z_count: int,
+    split: Callable[[int, int], tuple[np.ndarray, np.ndarray]],
+) -> tuple[np.ndarray, np.ndarray]:
+    # ``split(start, stop)`` returns the unpacked (x, z) measurements of those shots, so the
+    # one-byte-per-bit form only ever exists for one block of shots.
+    x_meas = np.empty((shots, rounds, -(-x_count // 8)), dtype=np.uint8)
+    z_meas = np.empty((shots, rounds, -(-z_count // 8)), dtype=np.uint8)
+    for start in range(0, shots, PACK_BLOCK_SHOTS):
+        stop = min(start + PACK_BLOCK_SHOTS, shots)
+        x_bits, z_bits = split(start, stop)
+        x_meas[start:stop] = pack_bits(x_bits)
+        z_meas[start:stop] = pack_bits(z_bits)
+    return x_meas, z_meas
 
 
 class SampledSyndromes:
-    def __init__(self, x_meas: np.ndarray, z_meas: np.ndarray):
+    def __init__(
+        self,
+        x_meas: np.ndarray,
+        z_meas: np.ndarray,
+        packed: bool = False,
+        x_count: int | None = None,
+        z_count: int | None = None,
+        detectors: np.ndarray | None = None,
+        observables: np.ndarray | None = None,
+        detector_count: int | None = None,
+        observable_count: int | None = None,
+        weights: np.ndarray | None = None,
+    ):
+        if packed and (x_count is None or z_count is None):
+            raise ValueError("x_count and z_count are required for packed syndromes")
+        if (
+            packed
+            and detectors is not None
+            and (detector_count is None or observable_count is None)
+        ):
+            raise ValueError(
+                "detector_count and observable_count are required for packed detectors"
+            )
         self.x_meas = x_meas
         self.z_meas = z_meas
-        self.x_detection = self._detection_events(self.x_meas)
-        self.z_detection = self._detection_events(self.z_meas)
+        self.packed = packed
+        self.x_count = x_meas.shape[2] if x_count is None else x_count
+        self.z_count = z_meas.shape[2] if z_count is None else z_count
+        # Circuit-level detection events and observable flips, in the circuit's detector order.
+        self.detectors = detectors
+        self.observables = observables
+        if detectors is not None and detector_count is None:
+            detector_count = detectors.shape[1]
+        if observables is not None and observable_count is None:
+            observable_count = observables.shape[1]
+        self.detector_count = detector_count
+        self.observable_count = observable_count
+        # Counts-mode samples hold one row per distinct outcome and how many shots produced it.
+        self.weights = weights
+        self._shots, self._rounds = x_meas.shape[:2]
+        self._x_detection: np.ndarray | None = None
+        self._z_detection: np.ndarray | None = None
+
+    @property
+    def shots(self) -> int:
+        return self._shots
+
+    @property
+    def rounds(self) -> int:
+        return self._rounds
+
+    @property
+    def total_shots(self) -> int:
+        return self._shots if self.weights is None else int(self.weights.sum())
+
+    @property
+    def x_detection(self) -> np.ndarray:
+        if self._x_detection is None:
+            self._x_detection = self._detection_events(self.x_meas)
+        return self._x_detection
+
+    @property
+    def z_detection(self) -> np.ndarray:
+        if self._z_detection is None:
+            self._z_detection = self._detection_events(self.z_meas)
+        return self._z_detection
 
     @staticmethod
-    def _detection_events(meas: np.ndarray) -> np.ndarray:
-        detection = np.zeros_like(meas, dtype=np.uint8)
+    def _detection_events(meas: np.ndarray, in_place: bool = False) -> np.ndarray:
+        # XOR is bitwise, so the same expression works on packed bytes and on 0/1 arrays.
+        if in_place:
+            # Walk rounds backwards so each round is XORed with its still-raw predecessor.
+            for r in range(meas.shape[1] - 1, 0, -1):
+                np.bitwise_xor(meas[:, r, :], meas[:, r - 1, :], out=meas[:, r, :])
+            return meas
+        detection = np.empty(meas.shape, dtype=np.uint8)
         detection[:, 0, :] = meas[:, 0, :]
-        if meas.shape[1] > 1:
-            detection[:, 1:, :] = np.bitwise_xor(meas[:, 1:, :], meas[:, :-1, :])
+        np.bitwise_xor(meas[:, 1:, :], meas[:, :-1, :], out=detection[:, 1:, :])
         return detection
 
+    def drop_measurements(self) -> "SampledSyndromes":
+        if self.x_meas is None:
+            return self
+        if self._x_detection is None:
+            in_place = self.x_meas.dtype == np.uint8 and self.x_meas.flags.writeable
+            self._x_detection = self._detection_events(self.x_meas, in_place=in_place)
+        if self._z_detection is None:
+            in_place = self.z_meas.dtype == np.uint8 and self.z_meas.flags.writeable
+            self._z_detection = self._detection_events(self.z_meas, in_place=in_place)
+        self.x_meas = None
+        self.z_meas = None
+        return self
+
+    @classmethod
+    def from_bits(
+        cls,
+        x_meas: np.ndarray,
+        z_meas: np.ndarray,
+        packed: bool = False,
+        weights: np.ndarray | None = None,
+    ) -> "SampledSyndromes":
+        if not packed:
+            return cls(x_meas=x_meas, z_meas=z_meas, weights=weights)
+        return cls(
+            x_meas=pack_bits(x_meas),
+            z_meas=pack_bits(z_meas),
+            packed=True,
+            x_count=x_meas.shape[2],
+            z_count=z_meas.shape[2],
+            weights=weights,
+        )
+
+    @classmethod
+    def from_detections(
+        cls, x_detection: np.ndarray, z_detection: np.ndarray, **kwargs
+    ) -> "SampledSyndromes":
+        # For stored samples that only kept detection events; the raw measurements are gone.
+        syndromes = cls(x_meas=x_detection, z_meas=z_detection, **kwargs)
+        syndromes._x_detection = x_detection
+        syndromes._z_detection = z_detection
+        syndromes.x_meas = None
+        syndromes.z_meas = None
+        return syndromes
+
+    def _require_measurements(self) -> None:
+        if self.x_meas is None:
+            raise ValueError("raw measurements were dropped from these syndromes")
+
+    def pack(self) -> "SampledSyndromes":
+        if self.packed:
+            return self
+        self._require_measurements()
+        return SampledSyndromes(
+            x_meas=pack_bits(self.x_meas),
+            z_meas=pack_bits(self.z_meas),
+            packed=True,
+            x_count=self.x_count,
+            z_count=self.z_count,
+            detectors=None if self.detectors is None else pack_bits(self.detectors),
+            observables=None if self.observables is None else pack_bits(self.observables),
+            detector_count=self.detector_count,
+            observable_count=self.observable_count,
+            weights=self.weights,
+        )
+
+    def unpack(self) -> "SampledSyndromes":
+        if not self.packed:
+            return self
+        self._require_measurements()
+        return SampledSyndromes(
+            x_meas=unpack_bits(self.x_meas, self.x_count),
+            z_meas=unpack_bits(self.z_meas, self.z_count),
+            detectors=None
+            if self.detectors is None
+            else unpack_bits(self.detectors, self.detector_count),
+            observables=None
+            if self.observables is None
+            else unpack_bits(self.observables, self.observable_count),
+            weights=self.weights,
+        )
 
-def sample_syndromes(config: ExperimentConfig) -> SampledSyndromes:
+    def observable_flips(self) -> np.ndarray:
+        if self.observables is None:
+            raise ValueError("these syndromes carry no observable data")
+        if self.packed:
+            return unpack_bits(self.observables, self.observable_count)
+        return self.observables
+
+
+def _bits_from_memory(
+    memory: list[str], rounds: int, x_count: int, z_count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Every bitstring has the same width ("mz mx", most significant bit first), so the joined
+    # ASCII reshapes to a (shots, width) byte matrix; dropping the register separator and
+    # reversing the columns puts the mx bits first, in classical-bit order.
+    width = len(memory[0])
+    joined = "".join(memory).encode("ascii")
+    chars = np.frombuffer(joined, dtype=np.uint8).reshape(len(memory), width)
+    bits = chars[:, chars[0] != ord(" ")][:, ::-1] - ord("0")
+    x_bits = bits[:, : rounds * x_count].reshape(-1, rounds, x_count)
+    z_bits = bits[:, rounds * x_count : rounds * (x_count + z_count)].reshape(-1, rounds, z_count)
+    return x_bits, z_bits
+
+
+@lru_cache(maxsize=1)
+def _simulator() -> AerSimulator:
+    # One simulator per process; noise and seed are passed per run, so replicas of a
+    # configuration only pay for ``run``.
+    return AerSimulator()
+
+
+@lru_cache(maxsize=32)
+def _transpiled_circuit(distance: int, rounds: int) -> tuple[QuantumCircuit, int, int]:
+    # Every gate in the memory circuit is native to Aer, so transpiling against the noiseless
+    # simulator yields the same circuit as transpiling against a noisy one.
+    circuit, layout = build_memory_circuit(distance, rounds)
+    transpiled = transpile(circuit, _simulator(), optimization_level=0)
+    return transpiled, len(layout.x_stabilizers), len(layout.z_stabilizers)
+
+
+@lru_cache(maxsize=32)
+def _noise_model(noise_key: tuple) -> NoiseModel:
+    return build_noise_model(NoiseParams(*noise_key))
+
+
+def aer_cache_info() -> dict:
+    info = {}
+    for name, fn in (("circuits", _transpiled_circuit), ("noise_models", _noise_model)):
+        stats = fn.cache_info()
+        info[name] = {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "size": stats.currsize,
+            "maxsize": stats.maxsize,
+        }
+    return info
+
+
+def clear_aer_cache() -> None:
+    _transpiled_circuit.cache_clear()
+    _noise_model.cache_clear()
+
+
+def _syndromes_from_result(
+    result, experiment, rounds: int, x_count: int, z_count: int, packed: bool, counts: bool
+) -> SampledSyndromes:
+    weights = None
+    if counts:
+        # One row per distinct outcome keeps memory and decode time proportional to the
+        # number of distinct syndromes rather than to the shot count.
+        histogram = result.get_counts(experiment)
+        memory = list(histogram)
+        weights = np.fromiter(histogram.values(), dtype=np.int64, count=len(histogram))
+    else:
+        memory = result.get_memory(experiment)
+    if not packed:
+        x_meas, z_meas = _bits_from_memory(memory, rounds, x_count, z_count)
+        return SampledSyndromes.from_bits(x_meas, z_meas, weights=weights)
+    x_meas, z_meas = pack_in_blocks(
+        len(memory),
+        rounds,
+        x_count,
+        z_count,
+        lambda start, stop: _bits_from_memory(memory[start:stop], rounds, x_count, z_count),
+    )
+    return SampledSyndromes(
+        x_meas=x_meas, z_meas=z_meas, packed=True, x_count=x_count, z_count=z_count, weights=weights
+    )
+
+
+def sample_syndromes(
+    config: ExperimentConfig, packed: bool = False, counts: bool = False
+) -> SampledSyndromes:
     seed_info = seed_everything(config.seed)
-    circuit, layout = build_memory_circuit(config.distance, config.rounds)
-    noise_model = build_noise_model(config.noise)
-    simulator = AerSimulator(noise_model=noise_model, seed_simulator=seed_info["seed"])
-    transpiled = transpile(circuit, simulator, optimization_level=0)
-    result = simulator.run(transpiled, shots=config.shots, memory=True).result()
-    memory = result.get_memory(transpiled)
-
-    x_count = len(layout.x_stabilizers)
-    z_count = len(layout.z_stabilizers)
-    rounds = config.rounds
-
-    x_meas = np.zeros((config.shots, rounds, x_count), dtype=np.uint8)
-    z_meas = np.zeros((config.shots, rounds, z_count), dtype=np.uint8)
-
-    for shot_idx, bitstring in enumerate(memory):
-        cleaned = bitstring.replace(" ", "")
-        bits = np.fromiter((int(b) for b in cleaned[::-1]), dtype=np.uint8)
-        x_bits = bits[: rounds * x_count].reshape(rounds, x_count)
-        z_bits = bits[rounds * x_count : rounds * x_count + rounds * z_count].reshape(rounds, z_count)
-        x_meas[shot_idx] = x_bits
-        z_meas[shot_idx] = z_bits
-
-    return SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+    transpiled, x_count, z_count = _transpiled_circuit(config.distance, config.rounds)
+    result = _simulator().run(
+        transpiled,
+        shots=config.shots,
+        memory=not counts,
+        noise_model=_noise_model(config.noise.fingerprint()),
+        seed_simulator=seed_info["seed"],
+    ).result()
+    return _syndromes_from_result(
+        result, transpiled, config.rounds, x_count, z_count, packed, counts
+    )
+
+
+def sample_syndromes_batch(
+    configs: list[ExperimentConfig], packed: bool = False, counts: bool = False
+) -> list[tuple[int, SampledSyndromes]]:
+    # One run call takes a single noise model and shot count, so configs are grouped on both
+    # and each group is submitted as a list of circuits. The error rate lives in the noise
+    # model rather than in a gate parameter, so every p value forms its own group.
+    groups: dict[tuple, list[int]] = {}
+    for idx, cfg in enumerate(configs):
+        if cfg.backend != "aer":
+            raise ValueError("sample_syndromes_batch only runs aer configs")
+        groups.setdefault((cfg.noise.fingerprint(), cfg.shots), []).append(idx)
+    samples: list[tuple[int, SampledSyndromes] | None] = [None] * len(configs)
+    for (noise_key, shots), indices in groups.items():
+        seed_info = seed_everything(configs[indices[0]].seed)
+        circuits = [
+            _transpiled_circuit(configs[idx].distance, configs[idx].rounds) for idx in indices
+        ]
+        result = _simulator().run(
+            [circuit for circuit, _, _ in circuits],
+            shots=shots,
+            memory=not counts,
+            noise_model=_noise_model(noise_key),
+            seed_simulator=seed_info["seed"],
+        ).result()
+        for pos, (idx, (_, x_count, z_count)) in enumerate(zip(indices, circuits, strict=True)):
+            # Aer seeds every experiment after the first from the group's seed, so each sample
+            # comes with the seed that reproduces it through sample_syndromes.
+            aer_seed = int(result.results[pos].seed_simulator)
+            rounds = configs[idx].rounds
+            samples[idx] = (
+                aer_seed,
+                _syndromes_from_result(result, pos, rounds, x_count, z_count, packed, counts),
+            )
+    return samples
@@ -0,0 +1,204 @@
+import os
+import shutil
+import uuid
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import pandas as pd
+
+from surface_code_sim.utils import ALLOWED_OUTPUT_FORMATS, CSV_FIELDS
+
+PARTITION_FIELDS = ("backend", "decoder", "distance")
+
+_STRING_FIELDS = {"run_id", "git_sha", "decoder", "backend", "config_fingerprint", "timestamp_utc"}
+_INT_FIELDS = {"seed", "aer_seed", "distance", "rounds", "shots"}
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError(
+            "the Parquet result store needs pyarrow: pip install 'surface-code-sim[parquet]'"
+        ) from exc
+    return pa, ds, pq
+
+
+def result_schema():
+    pa, _, _ = _arrow()
+
+    def field_type(name: str):
+        if name in _STRING_FIELDS:
+            return pa.string()
+        if name in _INT_FIELDS:
+            return pa.int64()
+        return pa.float64()
+
+    return pa.schema([(name, field_type(name)) for name in CSV_FIELDS])
+
+
+def _partitioning():
+    pa, ds, _ = _arrow()
+    schema = result_schema()
+    fields = [schema.field(name) for name in PARTITION_FIELDS]
+    return ds.partitioning(pa.schema(fields), flavor="hive")
+
+
+def write_results(rows: Iterable[dict], root: Path) -> list[Path]:
+    # One file per partition per batch. Each file is written under a dot-prefixed name,
+    # which dataset readers skip, and renamed into place, so readers never see a partial file.
+    pa, _, pq = _arrow()
+    schema = result_schema()
+    file_schema = pa.schema([field for field in schema if field.name not in PARTITION_FIELDS])
+    df = pd.DataFrame(list(rows), columns=CSV_FIELDS)
+    written = []
+    for keys, part in df.groupby(list(PARTITION_FIELDS), sort=False):
+        parts = (f"{name}={value}" for name, value in zip(PARTITION_FIELDS, keys, strict=True))
+        directory = Path(root).joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        data = part.drop(columns=list(PARTITION_FIELDS))
+        table = pa.Table.from_pandas(data, schema=file_schema, preserve_index=False)
+        target = directory / f"part-{uuid.uuid4().hex}.parquet"
+        tmp = directory / f".{target.name}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, target)
+        written.append(target)
+    return written
+
+
+def read_results(
+    root: Path,
+    filters: Sequence | None = None,
+    columns: Sequence[str] | None = None,
+) -> pd.DataFrame:
+    # ``filters`` takes the pyarrow.parquet DNF form, e.g. [("decoder", "==", "mwpm"),
+    # ("p", "<", 0.01)]; conditions on partition fields prune whole directories before any
+    # file is opened.
+    _, ds, pq = _arrow()
+    dataset = ds.dataset(
+        Path(root), format="parquet", partitioning=_partitioning(), schema=result_schema()
+    )
+    expression = pq.filters_to_expression(filters) if filters else None
+    table = dataset.to_table(columns=list(columns) if columns else None, filter=expression)
+    return table.to_pandas()
+
+
+def save_results(rows: list[dict], output: Path, output_format: str = "csv") -> None:
+    if output_format not in ALLOWED_OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {ALLOWED_OUTPUT_FORMATS}")
+    if output_format == "parquet":
+        write_results(rows, output)
+        return
+    _append_csv(pd.DataFrame(rows), output)
+
+
+def _append_csv(df: pd.DataFrame, output: Path) -> None:
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if not output.exists() or output.stat().st_size == 0:
+        df.to_csv(output, index=False)
+        return
+    header = list(pd.read_csv(output, nrows=0).columns)
+    added = [name for name in df.columns if name not in header]
+    if added:
+        # Files written before a column existed are rewritten once with the current columns
+        # first; old rows get blanks. Cells are copied as text so nothing is reformatted.
+        existing = pd.read_csv(output, dtype=str, keep_default_na=False)
+        header = list(df.columns) + [name for name in header if name not in df.columns]
+        tmp = output.with_name(f".{output.name}.tmp")
+        existing.reindex(columns=header, fill_value="").to_csv(tmp, index=False)
+        os.replace(tmp, output)
+    df.reindex(columns=header).to_csv(output, mode="a", header=False, index=False)
+
+
+class ResultWriter:
+    # Rows are written as soon as their task finishes, in the order tasks finish: CSV rows are
+    # appended and Parquet rows land in one new file per partition, so a killed sweep keeps
+    # every finished task. compact_results merges the small Parquet files afterwards.
+    def __init__(self, output: Path, output_format: str = "csv"):
+        if output_format not in ALLOWED_OUTPUT_FORMATS:
+            raise ValueError(f"output_format must be one of {ALLOWED_OUTPUT_FORMATS}")
+        self.output = output
+        self.output_format = output_format
+        self.written = 0
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def add(self, rows: Iterable[dict]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        save_results(rows, self.output, self.output_format)
+        self.written += len(rows)
+
+
+def _partition_dirs(root: Path) -> list[Path]:
+    dirs = {path.parent.relative_to(root) for path in root.rglob("part-*.parquet")}
+    # Compaction stages and retires directories under hidden names, which readers skip too.
+    visible = (d for d in dirs if not any(part.startswith(".") for part in d.parts))
+    return sorted(root / d for d in visible)
+
+
+def _finish_compactions(root: Path) -> None:
+    # A compaction swaps a partition directory for a hidden staged copy with two renames.
+    # If it was cut short after retiring the old directory, the staged file is moved into
+    # place; if it was cut short before, the old directory is still complete and the staged
+    # copy is dropped.
+    for staged in list(root.rglob(".*.compact")):
+        name = staged.name[1 : -len(".compact")]
+        directory = staged.with_name(name)
+        retired = staged.with_name(f".{name}.retired")
+        if retired.exists():
+            directory.mkdir(exist_ok=True)
+            for path in staged.iterdir():
+                os.replace(path, directory / path.name)
+        shutil.rmtree(staged)
+    for retired in list(root.rglob(".*.retired")):
+        shutil.rmtree(retired)
+
+
+def compact_results(root: Path) -> list[Path]:
+    # Merges every partition holding more than one file into a single file. The merged file
+    # is written to a hidden sibling directory, which dataset readers skip, and swapped in
+    # by renaming directories. Do not run this while a sweep is writing to the same store.
+    pa, _, pq = _arrow()
+    root = Path(root)
+    if not root.exists():
+        return []
+    _finish_compactions(root)
+    written = []
+    for directory in _partition_dirs(root):
+        files = sorted(directory.glob("part-*.parquet"))
+        if len(files) < 2:
+            continue
+        table = pa.concat_tables([pq.ParquetFile(path).read() for path in files])
+        staged = directory.with_name(f".{directory.name}.compact")
+        staged.mkdir()
+        target = f"part-{uuid.uuid4().hex}.parquet"
+        pq.write_table(table, staged / target)
+        retired = directory.with_name(f".{directory.name}.retired")
+        os.rename(directory, retired)
+        os.rename(staged, directory)
+        shutil.rmtree(retired)
+        written.append(directory / target)
+    return written
+
+
+def completed_fingerprints(output: Path, output_format: str = "csv") -> set[str]:
+    if not output.exists():
+        return set()
+    if output_format == "parquet":
+        # A compaction cut short hides its partition until it is finished.
+        _finish_compactions(output)
+        fingerprints = read_results(output, columns=["config_fingerprint"])["config_fingerprint"]
+    else:
+        header = pd.read_csv(output, nrows=0).columns
+        if "config_fingerprint" not in header:
+            return set()
+        fingerprints = pd.read_csv(output, usecols=["config_fingerprint"])["config_fingerprint"]
+    return set(fingerprints.dropna())
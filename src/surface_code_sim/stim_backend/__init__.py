@@ -1,4 +1,20 @@
-from surface_code_sim.stim_backend.circuit import build_stim_memory_circuit
-from surface_code_sim.stim_backend.sampler import sample_syndromes_stim
+from surface_code_sim.stim_backend.circuit import (
+    CachedMemoryCircuit,
+    build_stim_memory_circuit,
+    cached_memory_circuit,
+    cached_stim_memory_circuit,
+    circuit_cache_info,
+    clear_circuit_cache,
+)
+from surface_code_sim.stim_backend.sampler import sample_detections_stim, sample_syndromes_stim
 
-__all__ = ["build_stim_memory_circuit", "sample_syndromes_stim"]
+__all__ = [
+    "CachedMemoryCircuit",
+    "build_stim_memory_circuit",
+    "cached_memory_circuit",
+    "cached_stim_memory_circuit",
+    "circuit_cache_info",
+    "clear_circuit_cache",
+    "sample_detections_stim",
+    "sample_syndromes_stim",
+]
@@ -1,24 +1,60 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
 import stim
 
 from surface_code_sim.qiskit_frontend import build_layout
 from surface_code_sim.utils import NoiseParams
 
 
-def _single_qubit_noise(circuit: stim.Circuit, qubit: int, noise: NoiseParams) -> None:
+def _single_qubit_noise(circuit: stim.Circuit, qubits: list[int], noise: NoiseParams) -> None:
     if noise.model == "depolarizing":
         if noise.p > 0:
-            circuit.append("DEPOLARIZE1", [qubit], noise.p)
+            circuit.append("DEPOLARIZE1", qubits, noise.p)
     else:
-        circuit.append("PAULI_CHANNEL_1", [qubit], [float(noise.px), float(noise.py), float(noise.pz)])
+        circuit.append(
+            "PAULI_CHANNEL_1", qubits, [float(noise.px), float(noise.py), float(noise.pz)]
+        )
 
 
-def _two_qubit_noise(circuit: stim.Circuit, q0: int, q1: int, noise: NoiseParams) -> None:
+def _two_qubit_noise(circuit: stim.Circuit, pairs: list[int], noise: NoiseParams) -> None:
     if noise.model == "depolarizing":
         if noise.p > 0:
-            circuit.append("DEPOLARIZE2", [q0, q1], noise.p)
+            circuit.append("DEPOLARIZE2", pairs, noise.p)
     else:
-        _single_qubit_noise(circuit, q0, noise)
-        _single_qubit_noise(circuit, q1, noise)
+        _single_qubit_noise(circuit, pairs, noise)
+
+
+def _cx_layers(
+    circuit: stim.Circuit,
+    stabilizers: list[list[int]],
+    ancillas: list[int],
+    data_is_control: bool,
+    noise: NoiseParams,
+) -> None:
+    # Stabilizers are scheduled one after another, as if measured one at a time, but each CX
+    # goes into the earliest layer after the last gate on either of its qubits. Every qubit
+    # then sees its gates, and the noise after them, in per-stabilizer order, while the CXs
+    # of a layer act on disjoint qubits and share one instruction.
+    layers: list[list[int]] = []
+    ready: dict[int, int] = {}
+    for anc, stab in zip(ancillas, stabilizers, strict=True):
+        for data in stab:
+            layer = max(ready.get(data, 0), ready.get(anc, 0))
+            if layer == len(layers):
+                layers.append([])
+            layers[layer].extend((data, anc) if data_is_control else (anc, data))
+            ready[data] = ready[anc] = layer + 1
+    for pairs in layers:
+        circuit.append("CX", pairs)
+        _two_qubit_noise(circuit, pairs, noise)
+
+
+def _measure(circuit: stim.Circuit, ancillas: list[int], readout_p: float) -> None:
+    if readout_p > 0:
+        circuit.append("X_ERROR", ancillas, readout_p)
+    circuit.append("M", ancillas)
 
 
 def build_stim_memory_circuit(distance: int, rounds: int, noise: NoiseParams) -> tuple[stim.Circuit, int, int]:
@@ -31,29 +67,93 @@ def build_stim_memory_circuit(distance: int, rounds: int, noise: NoiseParams) ->
     data_count = len(layout.data_indices)
     z_count = len(layout.z_stabilizers)
     x_count = len(layout.x_stabilizers)
+    z_ancillas = [data_count + i for i in range(z_count)]
+    x_ancillas = [data_count + z_count + i for i in range(x_count)]
 
-    circuit = stim.Circuit()
-    for _ in range(rounds):
-        for anc_idx, stab in enumerate(layout.z_stabilizers):
-            anc = data_count + anc_idx
-            circuit.append("R", [anc])
-            for data_idx in stab:
-                circuit.append("CX", [data_idx, anc])
-                _two_qubit_noise(circuit, data_idx, anc, noise)
-            if readout_p > 0:
-                circuit.append("X_ERROR", [anc], readout_p)
-            circuit.append("M", [anc])
-        for anc_idx, stab in enumerate(layout.x_stabilizers):
-            anc = data_count + z_count + anc_idx
-            circuit.append("R", [anc])
-            circuit.append("H", [anc])
-            _single_qubit_noise(circuit, anc, noise)
-            for data_idx in stab:
-                circuit.append("CX", [anc, data_idx])
-                _two_qubit_noise(circuit, anc, data_idx, noise)
-            circuit.append("H", [anc])
-            _single_qubit_noise(circuit, anc, noise)
-            if readout_p > 0:
-                circuit.append("X_ERROR", [anc], readout_p)
-            circuit.append("M", [anc])
+    one_round = stim.Circuit()
+    one_round.append("R", z_ancillas)
+    _cx_layers(one_round, layout.z_stabilizers, z_ancillas, True, noise)
+    _measure(one_round, z_ancillas, readout_p)
+    one_round.append("R", x_ancillas)
+    one_round.append("H", x_ancillas)
+    _single_qubit_noise(one_round, x_ancillas, noise)
+    _cx_layers(one_round, layout.x_stabilizers, x_ancillas, False, noise)
+    one_round.append("H", x_ancillas)
+    _single_qubit_noise(one_round, x_ancillas, noise)
+    _measure(one_round, x_ancillas, readout_p)
+
+    # Data starts in |0>, so only the Z checks are deterministic in the first round; later
+    # rounds compare every check with its previous outcome.
+    per_round = z_count + x_count
+    circuit = one_round.copy()
+    for i in range(z_count):
+        circuit.append("DETECTOR", [stim.target_rec(i - per_round)])
+    if rounds > 1:
+        repeated = one_round.copy()
+        for i in range(per_round):
+            repeated.append(
+                "DETECTOR", [stim.target_rec(i - per_round), stim.target_rec(i - 2 * per_round)]
+            )
+        circuit += repeated * (rounds - 1)
+
+    # A final transversal readout of the data closes the Z checks and measures logical Z
+    # along the first row of the patch.
+    _measure(circuit, layout.data_indices, readout_p)
+    for i, stab in enumerate(layout.z_stabilizers):
+        targets = [stim.target_rec(q - data_count) for q in stab]
+        circuit.append("DETECTOR", targets + [stim.target_rec(i - per_round - data_count)])
+    circuit.append(
+        "OBSERVABLE_INCLUDE", [stim.target_rec(q - data_count) for q in range(distance)], 0
+    )
     return circuit, x_count, z_count
+
+
+@dataclass(frozen=True)
+class CachedMemoryCircuit:
+    circuit: stim.Circuit
+    x_count: int
+    z_count: int
+    reference_sample: np.ndarray
+    converter: stim.CompiledMeasurementsToDetectionEventsConverter
+
+    def compile_sampler(self, seed: int) -> stim.CompiledMeasurementSampler:
+        return self.circuit.compile_sampler(seed=seed, reference_sample=self.reference_sample)
+
+
+@lru_cache(maxsize=32)
+def _cached_circuit(distance: int, rounds: int, noise_key: tuple) -> CachedMemoryCircuit:
+    circuit, x_count, z_count = build_stim_memory_circuit(distance, rounds, NoiseParams(*noise_key))
+    # The reference sample is the expensive part of compile_sampler; keeping it lets every
+    # seed compile a fresh sampler without re-simulating the noiseless circuit.
+    return CachedMemoryCircuit(
+        circuit=circuit,
+        x_count=x_count,
+        z_count=z_count,
+        reference_sample=circuit.reference_sample(),
+        converter=circuit.compile_m2d_converter(),
+    )
+
+
+def cached_memory_circuit(distance: int, rounds: int, noise: NoiseParams) -> CachedMemoryCircuit:
+    return _cached_circuit(distance, rounds, noise.fingerprint())
+
+
+def cached_stim_memory_circuit(
+    distance: int, rounds: int, noise: NoiseParams
+) -> tuple[stim.Circuit, int, int]:
+    entry = cached_memory_circuit(distance, rounds, noise)
+    return entry.circuit, entry.x_count, entry.z_count
+
+
+def circuit_cache_info() -> dict:
+    info = _cached_circuit.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+def clear_circuit_cache() -> None:
+    _cached_circuit.cache_clear()
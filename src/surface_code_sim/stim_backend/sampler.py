@@ -1,28 +1,129 @@
 import numpy as np
-import stim
 
 from surface_code_sim.qiskit_frontend import SampledSyndromes
-from surface_code_sim.stim_backend.circuit import build_stim_memory_circuit
+from surface_code_sim.qiskit_frontend.sampler import pack_in_blocks, unpack_bits
+from surface_code_sim.stim_backend.circuit import cached_memory_circuit
 from surface_code_sim.utils import ExperimentConfig
 
 
-def sample_syndromes_stim(config: ExperimentConfig) -> SampledSyndromes:
-    circuit, x_count, z_count = build_stim_memory_circuit(config.distance, config.rounds, config.noise)
-    sampler = circuit.compile_sampler(seed=config.seed)
-    raw = sampler.sample(shots=config.shots)
+def _split_rounds(
+    raw: np.ndarray, rounds: int, x_count: int, z_count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Each round records all Z ancillas followed by all X ancillas, so the stabilizer part of
+    # the record reshapes to (shots, rounds, z_count + x_count) and splits into two strided views.
+    per_round = z_count + x_count
+    blocks = raw[:, : rounds * per_round].view(np.uint8).reshape(raw.shape[0], rounds, per_round)
+    return blocks[:, :, z_count:], blocks[:, :, :z_count]
 
-    rounds = config.rounds
-    z_meas = np.zeros((config.shots, rounds, z_count), dtype=np.uint8)
-    x_meas = np.zeros((config.shots, rounds, x_count), dtype=np.uint8)
 
-    for shot_idx, row in enumerate(raw):
-        idx = 0
-        for r in range(rounds):
-            z_slice = row[idx : idx + z_count]
-            z_meas[shot_idx, r, :] = z_slice
-            idx += z_count
-            x_slice = row[idx : idx + x_count]
-            x_meas[shot_idx, r, :] = x_slice
-            idx += x_count
+def sample_syndromes_stim(config: ExperimentConfig, packed: bool = False) -> SampledSyndromes:
+    entry = cached_memory_circuit(config.distance, config.rounds, config.noise)
+    # Packed runs sample the record bit-packed and split it into rounds one block of shots
+    # at a time, so the full record is never held one byte per bit.
+    raw = entry.compile_sampler(config.seed).sample(shots=config.shots, bit_packed=packed)
+    detectors, observables = entry.converter.convert(
+        measurements=raw, separate_observables=True, bit_packed=packed
+    )
+    if packed:
+        stabilizer_bits = config.rounds * (entry.x_count + entry.z_count)
+        x_meas, z_meas = pack_in_blocks(
+            config.shots,
+            config.rounds,
+            entry.x_count,
+            entry.z_count,
+            lambda start, stop: _split_rounds(
+                unpack_bits(raw[start:stop], stabilizer_bits),
+                config.rounds,
+                entry.x_count,
+                entry.z_count,
+            ),
+        )
+    else:
+        x_meas, z_meas = _split_rounds(raw, config.rounds, entry.x_count, entry.z_count)
+        detectors, observables = detectors.view(np.uint8), observables.view(np.uint8)
+    return SampledSyndromes(
+        x_meas=x_meas,
+        z_meas=z_meas,
+        packed=packed,
+        x_count=entry.x_count,
+        z_count=entry.z_count,
+        detectors=detectors,
+        observables=observables,
+        detector_count=entry.circuit.num_detectors,
+        observable_count=entry.circuit.num_observables,
+    )
 
-    return SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+
+def _detection_blocks(
+    detectors: np.ndarray, rounds: int, x_count: int, z_count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Detectors follow build_stim_memory_circuit: first-round Z checks, then the Z and X checks
+    # of every later round, then the Z checks closed by the final data readout. First-round X
+    # checks are not deterministic, carry no detector, and are reported as quiet.
+    shots = detectors.shape[0]
+    per_round = z_count + x_count
+    stop = z_count + (rounds - 1) * per_round
+    later = detectors[:, z_count:stop].reshape(shots, rounds - 1, per_round)
+    x_detection = np.zeros((shots, rounds, x_count), dtype=np.uint8)
+    z_detection = np.empty((shots, rounds, z_count), dtype=np.uint8)
+    z_detection[:, 0, :] = detectors[:, :z_count]
+    z_detection[:, 1:, :] = later[:, :, :z_count]
+    x_detection[:, 1:, :] = later[:, :, z_count:]
+    return x_detection, z_detection
+
+
+def _packed_bit_blocks(packed: np.ndarray, starts: np.ndarray, count: int) -> np.ndarray:
+    # Copies ``count`` bits from each start offset of little-endian packed rows into their own
+    # packed bytes, (shots, len(starts), ceil(count / 8)). Each output byte is the pair of
+    # source bytes it straddles shifted down, so nothing is unpacked.
+    width = -(-count // 8)
+    # A clipped index only feeds bits past the end of the row, which the final mask clears.
+    index = np.minimum(starts[:, None] // 8 + np.arange(width + 1), packed.shape[1] - 1)
+    words = packed[:, index].astype(np.uint16)
+    words = words[..., :-1] | (words[..., 1:] << 8)
+    blocks = (words >> (starts % 8).astype(np.uint16)[:, None]).astype(np.uint8)
+    if count % 8:
+        blocks[..., -1] &= (1 << (count % 8)) - 1
+    return blocks
+
+
+def _packed_detection_blocks(
+    detectors: np.ndarray, rounds: int, x_count: int, z_count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Same layout as _detection_blocks, read from bit-packed detector rows.
+    per_round = z_count + x_count
+    later = z_count + per_round * np.arange(rounds - 1)
+    x_detection = np.zeros((detectors.shape[0], rounds, -(-x_count // 8)), dtype=np.uint8)
+    x_detection[:, 1:] = _packed_bit_blocks(detectors, later + z_count, x_count)
+    z_detection = _packed_bit_blocks(detectors, np.concatenate(([0], later)), z_count)
+    return x_detection, z_detection
+
+
+def sample_detections_stim(config: ExperimentConfig, packed: bool = False) -> SampledSyndromes:
+    # Stim's detector sampler emits detection events and observable flips directly, so no
+    # measurement record is kept and no round-to-round XOR is needed.
+    entry = cached_memory_circuit(config.distance, config.rounds, config.noise)
+    sampler = entry.circuit.compile_detector_sampler(seed=config.seed)
+    detectors, observables = sampler.sample(
+        config.shots, separate_observables=True, bit_packed=packed
+    )
+    if packed:
+        x_detection, z_detection = _packed_detection_blocks(
+            detectors, config.rounds, entry.x_count, entry.z_count
+        )
+    else:
+        detectors, observables = detectors.view(np.uint8), observables.view(np.uint8)
+        x_detection, z_detection = _detection_blocks(
+            detectors, config.rounds, entry.x_count, entry.z_count
+        )
+    return SampledSyndromes.from_detections(
+        x_detection,
+        z_detection,
+        packed=packed,
+        x_count=entry.x_count,
+        z_count=entry.z_count,
+        detectors=detectors,
+        observables=observables,
+        detector_count=entry.circuit.num_detectors,
+        observable_count=entry.circuit.num_observables,
+    )
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing.util import Finalize
+
+import numpy as np
+
+from surface_code_sim.plotting import binomial_ci
+from surface_code_sim.qiskit_frontend import SampledSyndromes
+from surface_code_sim.utils import ExperimentConfig
+
+Sampler = Callable[[ExperimentConfig], SampledSyndromes]
+
+
+def chunk_seed(seed: int, index: int) -> int:
+    # The first chunk keeps the run seed so a run that fits in one chunk matches an unchunked run.
+    if index == 0:
+        return seed
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0])
+
+
+def chunk_configs(config: ExperimentConfig, chunk_shots: int) -> Iterator[ExperimentConfig]:
+    if chunk_shots <= 0:
+        raise ValueError("chunk_shots must be positive")
+    remaining = config.shots
+    index = 0
+    while remaining > 0:
+        shots = min(chunk_shots, remaining)
+        yield replace(config, shots=shots, seed=chunk_seed(config.seed, index))
+        remaining -= shots
+        index += 1
+
+
+_PREFETCH_POOLS: dict[int, ProcessPoolExecutor] = {}
+_PREFETCH_LOCK = threading.Lock()
+
+
+def _shutdown_prefetch() -> None:
+    pool = _PREFETCH_POOLS.pop(os.getpid(), None)
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _prefetch_pool() -> ProcessPoolExecutor:
+    # One helper per process, kept for the life of the process, so streamed runs do not pay
+    # a pool start-up each. It is spawned rather than forked because sweeps stream from
+    # thread-pool workers, and forking a threaded process can copy a held lock. Entries are
+    # keyed by pid so forked sweep workers start their own helper instead of the parent's.
+    with _PREFETCH_LOCK:
+        pid = os.getpid()
+        if pid not in _PREFETCH_POOLS:
+            context = multiprocessing.get_context("spawn")
+            _PREFETCH_POOLS[pid] = ProcessPoolExecutor(max_workers=1, mp_context=context)
+            # Sweep worker processes exit without running atexit hooks and join their
+            # children first, so the helper is shut down by a multiprocessing finalizer. It
+            # must run before the finalizers that stop the pool's queue feeder threads.
+            Finalize(None, _shutdown_prefetch, exitpriority=100)
+        return _PREFETCH_POOLS[pid]
+
+
+def _prefetched(
+    sample_fn: Sampler, configs: Iterator[ExperimentConfig], pool: Executor
+) -> Iterator[SampledSyndromes]:
+    pending = pool.submit(sample_fn, next(configs))
+    for cfg in configs:
+        chunk = pending.result()
+        pending = pool.submit(sample_fn, cfg)
+        yield chunk
+    yield pending.result()
+
+
+def iter_syndrome_chunks(
+    config: ExperimentConfig,
+    chunk_shots: int,
+    sample_fn: Sampler,
+    prefetch: bool = True,
+) -> Iterator[SampledSyndromes]:
+    # Both samplers hold the GIL, so the next chunk is drawn in a helper process while the
+    # caller works on the current one; at most two chunks are alive at any time.
+    if not prefetch or config.shots <= chunk_shots:
+        for cfg in chunk_configs(config, chunk_shots):
+            yield sample_fn(cfg)
+        return
+    yield from _prefetched(sample_fn, chunk_configs(config, chunk_shots), _prefetch_pool())
+
+
+def logical_failures(decoded: dict) -> np.ndarray:
+    return (decoded["x_logical"] | decoded["z_logical"]) != 0
+
+
+def failure_counts(decoded: dict, syndromes: SampledSyndromes) -> tuple[int, int]:
+    failed = logical_failures(decoded)
+    if syndromes.weights is None:
+        return int(np.count_nonzero(failed)), syndromes.shots
+    return int(syndromes.weights[failed].sum()), syndromes.total_shots
+
+
+def relative_ci_width(failures: int, shots: int, method: str = "wilson", seed: int = 0) -> float:
+    # Width of the interval the row will report, over the point estimate; infinite until the
+    # first failure is seen.
+    if failures == 0 or shots == 0:
+        return float("inf")
+    low, high = binomial_ci(failures, shots, method=method, seed=seed)
+    return (high - low) / (failures / shots)
+
+
+def stream_failures(
+    config: ExperimentConfig,
+    decoder,
+    chunk_shots: int,
+    sample_fn: Sampler,
+    prefetch: bool = True,
+) -> tuple[int, int]:
+    failures = 0
+    shots = 0
+    for chunk in iter_syndrome_chunks(config, chunk_shots, sample_fn, prefetch=prefetch):
+        chunk_failures, chunk_total = failure_counts(
+            decoder.decode(chunk.drop_measurements()), chunk
+        )
+        failures += chunk_failures
+        shots += chunk_total
+    return failures, shots
+
+
+def adaptive_failures(
+    config: ExperimentConfig,
+    decoder,
+    chunk_shots: int,
+    sample_fn: Sampler,
+    max_shots: int,
+    target_rel_ci: float | None = None,
+    min_failures: int | None = None,
+    prefetch: bool = True,
+    ci_method: str = "wilson",
+) -> tuple[int, int]:
+    # Chunks follow the same seeds as a fixed-size stream of max_shots, so stopping early
+    # yields a prefix of that run.
+    failures = 0
+    shots = 0
+    budget = replace(config, shots=max_shots)
+    for chunk in iter_syndrome_chunks(budget, chunk_shots, sample_fn, prefetch=prefetch):
+        decoded = decoder.decode(chunk.drop_measurements())
+        chunk_failures, chunk_total = failure_counts(decoded, chunk)
+        failures += chunk_failures
+        shots += chunk_total
+        enough_failures = min_failures is None or failures >= min_failures
+        narrow_enough = (
+            target_rel_ci is None
+            or relative_ci_width(failures, shots, ci_method, config.seed) <= target_rel_ci
+        )
+        if enough_failures and narrow_enough:
+            break
+    return failures, shots
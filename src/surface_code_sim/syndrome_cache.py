@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from surface_code_sim.qiskit_frontend import SampledSyndromes
+from surface_code_sim.utils import ExperimentConfig
+
+_ARRAYS = ("x_meas", "z_meas", "detectors", "observables", "weights")
+_DETECTIONS = ("x_detection", "z_detection")
+_COUNTS = ("x_count", "z_count", "detector_count", "observable_count")
+
+# Bump whenever circuits, samplers or the stored layout change, so entries written by older
+# code stop matching instead of being decoded as if they were current.
+SYNDROME_FORMAT = 1
+
+
+def syndrome_key(
+    config: ExperimentConfig, packed: bool, counts: bool, stim_detectors: bool = False
+) -> str:
+    # The decoder is left out so every decoder on a sweep point shares one sample.
+    key = [
+        SYNDROME_FORMAT,
+        config.backend,
+        config.distance,
+        config.rounds,
+        config.shots,
+        config.noise.fingerprint(),
+        config.seed,
+        packed,
+        counts,
+        stim_detectors,
+    ]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+class SyndromeCache:
+    def __init__(self, root: Path, max_bytes: int = 2**30):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _entries(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [
+            path
+            for path in self.root.iterdir()
+            if path.is_dir() and not path.name.startswith(".")
+        ]
+
+    @staticmethod
+    def _entry_bytes(entry: Path) -> int:
+        return sum(path.stat().st_size for path in entry.iterdir())
+
+    def size_bytes(self) -> int:
+        return sum(self._entry_bytes(entry) for entry in self._entries())
+
+    def load(self, key: str) -> SampledSyndromes | None:
+        entry = self.root / key
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+            # Read-only maps keep drop_measurements from converting the cached buffers in place.
+            arrays = {
+                name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]
+            }
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        counts = {name: meta[name] for name in _COUNTS}
+        if "x_detection" in arrays:
+            return SampledSyndromes.from_detections(packed=meta["packed"], **counts, **arrays)
+        return SampledSyndromes(packed=meta["packed"], **counts, **arrays)
+
+    def store(self, key: str, syndromes: SampledSyndromes) -> None:
+        # Entries are assembled in a hidden directory and renamed into place, so concurrent
+        # workers never load a partial entry; if another worker got there first, its copy wins.
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        # Samples without a measurement record are stored as their detection events.
+        names = _ARRAYS if syndromes.x_meas is not None else _DETECTIONS + _ARRAYS[2:]
+        arrays = [name for name in names if getattr(syndromes, name) is not None]
+        for name in arrays:
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(syndromes, name)))
+        meta = {"packed": syndromes.packed, "arrays": arrays}
+        meta.update({name: getattr(syndromes, name) for name in _COUNTS})
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        try:
+            os.rename(tmp, self.root / key)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat().st_mtime, self._entry_bytes(entry), entry))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def fetch(
+        self,
+        config: ExperimentConfig,
+        sample_fn: Callable[[ExperimentConfig], SampledSyndromes],
+        packed: bool = False,
+        counts: bool = False,
+        stim_detectors: bool = False,
+    ) -> SampledSyndromes:
+        key = syndrome_key(config, packed, counts, stim_detectors)
+        cached = self.load(key)
+        if cached is not None:
+            return cached
+        syndromes = sample_fn(config)
+        self.store(key, syndromes)
+        return syndromes
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
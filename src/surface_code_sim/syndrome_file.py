@@ -0,0 +1,154 @@
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import asdict
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+from surface_code_sim.qiskit_frontend import SampledSyndromes
+from surface_code_sim.streaming import Sampler, iter_syndrome_chunks
+from surface_code_sim.utils import ExperimentConfig, NoiseParams
+
+MAGIC = b"SCSYND1\n"
+_ALIGN = 64
+_ARRAYS = ("x_detection", "z_detection", "detectors", "observables")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _data_start(header_bytes: bytes) -> int:
+    return _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+
+def write_syndrome_file(
+    path: Path,
+    config: ExperimentConfig,
+    chunk_shots: int,
+    sample_fn: Sampler,
+    stim_detectors: bool = False,
+) -> dict:
+    # Layout: magic, little-endian uint64 header length, JSON header, then one packed
+    # (shots, ...) uint8 block per array at 64-byte aligned offsets. Chunks are written
+    # straight into a memory map, so the sample never has to fit in memory.
+    # ``sample_fn`` must return packed syndromes with measurements dropped.
+    path = Path(path)
+    chunks = iter_syndrome_chunks(config, chunk_shots, sample_fn)
+    first = next(chunks)
+    if not first.packed or first.weights is not None:
+        raise ValueError("syndrome files hold packed per-shot samples")
+    present = {name: getattr(first, name) for name in _ARRAYS if getattr(first, name) is not None}
+    arrays = {}
+    offset = 0
+    for name, block in present.items():
+        per_shot = list(block.shape[1:])
+        arrays[name] = {"offset": offset, "shape": per_shot, "dtype": "uint8"}
+        offset = _aligned(offset + config.shots * int(np.prod(per_shot)))
+    header = {
+        "version": 1,
+        "config": {
+            "distance": config.distance,
+            "rounds": config.rounds,
+            "shots": config.shots,
+            "noise": asdict(config.noise),
+            "backend": config.backend,
+            "seed": config.seed,
+        },
+        "layout": {
+            "x_count": first.x_count,
+            "z_count": first.z_count,
+            "detector_count": first.detector_count,
+            "observable_count": first.observable_count,
+        },
+        "arrays": arrays,
+        "stim_detectors": stim_detectors,
+    }
+    header_bytes = json.dumps(header).encode()
+    start = _data_start(header_bytes)
+    tmp = path.with_name(f".{path.name}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        f.truncate(start + offset)
+    maps = {
+        name: np.memmap(
+            tmp,
+            dtype=np.uint8,
+            mode="r+",
+            offset=start + spec["offset"],
+            shape=(config.shots, *spec["shape"]),
+        )
+        for name, spec in arrays.items()
+    }
+    row = 0
+    for chunk in chain([first], chunks):
+        for name, target in maps.items():
+            target[row : row + chunk.shots] = getattr(chunk, name)
+        row += chunk.shots
+    for target in maps.values():
+        target.flush()
+    del maps
+    os.replace(tmp, path)
+    return header
+
+
+class SyndromeFile:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a syndrome file")
+            length = int.from_bytes(f.read(8), "little")
+            header_bytes = f.read(length)
+        self.header = json.loads(header_bytes)
+        start = _data_start(header_bytes)
+        shots = self.header["config"]["shots"]
+        self.arrays = {
+            name: np.memmap(
+                self.path,
+                dtype=spec["dtype"],
+                mode="r",
+                offset=start + spec["offset"],
+                shape=(shots, *spec["shape"]),
+            )
+            for name, spec in self.header["arrays"].items()
+        }
+
+    @property
+    def shots(self) -> int:
+        return self.header["config"]["shots"]
+
+    def config(self, decoder: str = "mwpm") -> ExperimentConfig:
+        cfg = self.header["config"]
+        return ExperimentConfig(
+            distance=cfg["distance"],
+            rounds=cfg["rounds"],
+            shots=cfg["shots"],
+            noise=NoiseParams(**cfg["noise"]),
+            decoder=decoder,
+            backend=cfg["backend"],
+            seed=cfg["seed"],
+        )
+
+    def iter_chunks(self, chunk_shots: int) -> Iterator[SampledSyndromes]:
+        # Row slices of the read-only maps are contiguous views, so decoders read the file
+        # pages directly.
+        if chunk_shots <= 0:
+            raise ValueError("chunk_shots must be positive")
+        layout = self.header["layout"]
+        for start in range(0, self.shots, chunk_shots):
+            stop = min(start + chunk_shots, self.shots)
+            views = {name: block[start:stop] for name, block in self.arrays.items()}
+            yield SampledSyndromes.from_detections(
+                views["x_detection"],
+                views["z_detection"],
+                packed=True,
+                detectors=views.get("detectors"),
+                observables=views.get("observables"),
+                **layout,
+            )
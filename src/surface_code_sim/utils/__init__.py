@@ -1,12 +1,16 @@
 from .config import (
     ALLOWED_BACKENDS,
+    ALLOWED_CI_METHODS,
     ALLOWED_DECODERS,
     ALLOWED_DISTANCES,
+    ALLOWED_EXECUTORS,
+    ALLOWED_OUTPUT_FORMATS,
     CSV_FIELDS,
     ExperimentConfig,
     FigureCommand,
     NoiseParams,
     RunMetadata,
+    RunOptions,
     make_csv_row,
 )
 from .seed import seed_everything
@@ -15,12 +19,16 @@ from .git import resolve_git_sha
 __all__ = [
     "seed_everything",
     "ALLOWED_BACKENDS",
+    "ALLOWED_CI_METHODS",
     "ALLOWED_DECODERS",
     "ALLOWED_DISTANCES",
+    "ALLOWED_EXECUTORS",
+    "ALLOWED_OUTPUT_FORMATS",
     "CSV_FIELDS",
     "ExperimentConfig",
     "NoiseParams",
     "RunMetadata",
+    "RunOptions",
     "FigureCommand",
     "make_csv_row",
     "resolve_git_sha",
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+import hashlib
+import json
+from dataclasses import asdict, astuple, dataclass
 from datetime import datetime, timezone
 from typing import Literal
 
 ALLOWED_DISTANCES = (3, 5, 7, 9)
 ALLOWED_DECODERS = ("local", "mwpm")
 ALLOWED_BACKENDS = ("aer", "stim")
+ALLOWED_EXECUTORS = ("thread", "process")
+ALLOWED_CI_METHODS = ("wilson", "clopper-pearson", "bootstrap")
+ALLOWED_OUTPUT_FORMATS = ("csv", "parquet")
 
 CSV_FIELDS = [
     "run_id",
@@ -28,6 +33,9 @@ CSV_FIELDS = [
     "ci_low",
     "ci_high",
     "wall_time_seconds",
+    "decode_cache_hit_rate",
+    "config_fingerprint",
+    "aer_seed",
     "timestamp_utc",
 ]
 
@@ -66,6 +74,10 @@ class NoiseParams:
                 raise ValueError("px+py+pz must be <= 1")
             self.p = 0.0
 
+    def fingerprint(self) -> tuple:
+        self.validate()
+        return astuple(self)
+
 
 @dataclass
 class ExperimentConfig:
@@ -90,6 +102,20 @@ class ExperimentConfig:
             raise ValueError(f"backend must be one of {ALLOWED_BACKENDS}")
         self.noise.validate()
 
+    def fingerprint(self, git_sha: str) -> str:
+        # Identifies a requested run across sweeps so resumed sweeps can skip finished work.
+        key = [
+            self.distance,
+            self.rounds,
+            self.shots,
+            self.noise.fingerprint(),
+            self.decoder,
+            self.backend,
+            self.seed,
+            git_sha,
+        ]
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+
     def to_dict(self) -> dict:
         data = asdict(self)
         data.update(
@@ -106,6 +132,55 @@ class ExperimentConfig:
         return data
 
 
+@dataclass
+class RunOptions:
+    packed: bool = False
+    chunk_shots: int | None = None
+    decode_workers: int = 1
+    aer_counts: bool = False
+    decode_cache_size: int = 0
+    aer_batch: bool = False
+    target_rel_ci: float | None = None
+    min_failures: int | None = None
+    max_shots: int | None = None
+    ci_method: str = "wilson"
+    syndrome_cache: str | None = None
+    syndrome_cache_mb: int = 1024
+    stim_detectors: bool = False
+
+    @property
+    def adaptive(self) -> bool:
+        return self.target_rel_ci is not None or self.min_failures is not None
+
+    def __post_init__(self) -> None:
+        if self.ci_method not in ALLOWED_CI_METHODS:
+            raise ValueError(f"ci_method must be one of {ALLOWED_CI_METHODS}")
+        if self.syndrome_cache_mb <= 0:
+            raise ValueError("syndrome_cache_mb must be positive")
+        if self.chunk_shots is not None and self.chunk_shots <= 0:
+            raise ValueError("chunk_shots must be positive")
+        if self.decode_workers <= 0:
+            raise ValueError("decode_workers must be positive")
+        if self.decode_cache_size < 0:
+            raise ValueError("decode_cache_size must be non-negative")
+        if self.aer_batch and self.chunk_shots is not None:
+            raise ValueError("aer_batch cannot be combined with chunk_shots")
+        if self.target_rel_ci is not None and self.target_rel_ci <= 0:
+            raise ValueError("target_rel_ci must be positive")
+        if self.min_failures is not None and self.min_failures <= 0:
+            raise ValueError("min_failures must be positive")
+        if self.max_shots is not None and self.max_shots <= 0:
+            raise ValueError("max_shots must be positive")
+        if self.adaptive and self.max_shots is None:
+            raise ValueError("max_shots is required with target_rel_ci or min_failures")
+        if self.adaptive and self.aer_batch:
+            raise ValueError("aer_batch cannot be combined with adaptive shots")
+        # Batched experiments are drawn with seeds Aer derives from their batch position, so
+        # they cannot be stored under their configured seed.
+        if self.aer_batch and self.syndrome_cache is not None:
+            raise ValueError("aer_batch cannot be combined with syndrome_cache")
+
+
 @dataclass
 class RunMetadata:
     run_id: str
@@ -136,6 +211,9 @@ def make_csv_row(
     ci_low: float | None,
     ci_high: float | None,
     wall_time_seconds: float,
+    decode_cache_hit_rate: float | None = None,
+    config_fingerprint: str | None = None,
+    aer_seed: int | None = None,
 ) -> dict:
     row = {field: None for field in CSV_FIELDS}
     row.update({
@@ -158,6 +236,9 @@ def make_csv_row(
         "ci_low": ci_low,
         "ci_high": ci_high,
         "wall_time_seconds": wall_time_seconds,
+        "decode_cache_hit_rate": decode_cache_hit_rate,
+        "config_fingerprint": config_fingerprint,
+        "aer_seed": aer_seed,
         "timestamp_utc": metadata.timestamp_iso(),
     })
     return row
@@ -1,6 +1,10 @@
 import pandas as pd
+import pytest
 
+from surface_code_sim import cli
 from surface_code_sim.cli import run_sweep
+from surface_code_sim.decoders import mwpm
+from surface_code_sim.utils import CSV_FIELDS
 
 
 def test_cli_sweep_writes_csv(tmp_path, monkeypatch):
@@ -22,3 +26,288 @@ def test_cli_sweep_writes_csv(tmp_path, monkeypatch):
     df = pd.read_csv(out)
     assert len(df) == 1
     assert df.iloc[0]["run_id"] == "test-0000"
+
+
+def test_cli_sweep_streams_chunks(tmp_path):
+    out = tmp_path / "runs.csv"
+    run_sweep(
+        distance=[3],
+        rounds=2,
+        shots=50,
+        backend=["stim"],
+        decoder=["mwpm"],
+        p=[0.01],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="stream",
+        chunk_shots=20,
+    )
+    df = pd.read_csv(out)
+    assert len(df) == 1
+    assert df.iloc[0]["shots"] == 50
+    assert 0 <= df.iloc[0]["logical_error_rate"] <= 1
+
+
+def test_cli_sweep_process_pool_writes_every_config(tmp_path):
+    out = tmp_path / "runs.csv"
+    run_sweep(
+        distance=[3, 5],
+        rounds=2,
+        shots=40,
+        backend=["stim"],
+        decoder=["local", "mwpm"],
+        p=[0.01],
+        seed=0,
+        jobs=2,
+        output=out,
+        git_sha="abc",
+        run_prefix="pool",
+        chunk_shots=15,
+        executor="process",
+    )
+    # Rows land in completion order; run ids still follow the config order.
+    df = pd.read_csv(out).sort_values("run_id")
+    assert list(df["run_id"]) == [f"pool-{idx:04d}" for idx in range(4)]
+    assert list(df["decoder"]) == ["local", "mwpm", "local", "mwpm"]
+
+
+def test_cli_sweep_process_pool_workers_shard_decoding(tmp_path, monkeypatch):
+    # Forked sweep workers start and shut down their own decode pools.
+    monkeypatch.setattr(mwpm, "_MIN_SHARD_SHOTS", 1)
+    args = dict(
+        distance=[3],
+        rounds=2,
+        shots=40,
+        backend=["stim"],
+        decoder=["mwpm"],
+        p=[0.01, 0.02],
+        seed=0,
+        git_sha="abc",
+        run_prefix="shard",
+    )
+    run_sweep(output=tmp_path / "serial.csv", jobs=1, **args)
+    run_sweep(output=tmp_path / "sharded.csv", jobs=2, decode_workers=2, **args)
+    serial = pd.read_csv(tmp_path / "serial.csv").sort_values("run_id")
+    sharded = pd.read_csv(tmp_path / "sharded.csv").sort_values("run_id")
+    assert list(sharded["logical_error_rate"]) == list(serial["logical_error_rate"])
+
+
+def test_cli_sweep_rejects_unknown_executor(tmp_path):
+    with pytest.raises(ValueError):
+        run_sweep(
+            distance=[3],
+            rounds=1,
+            shots=2,
+            backend=["stim"],
+            decoder=["local"],
+            p=[0.0],
+            jobs=2,
+            output=tmp_path / "runs.csv",
+            git_sha="abc",
+            executor="fiber",
+        )
+
+
+def test_cli_sweep_appends_to_csv_written_before_new_columns(tmp_path):
+    out = tmp_path / "runs.csv"
+    new_fields = ("decode_cache_hit_rate", "config_fingerprint", "aer_seed")
+    old_fields = [f for f in CSV_FIELDS if f not in new_fields]
+    old_row = dict.fromkeys(old_fields, "")
+    old_row.update(run_id="old-0000", git_sha="0123456", seed=7, distance=3, shots=10, p=0.01)
+    pd.DataFrame([old_row], columns=old_fields).to_csv(out, index=False)
+    args = dict(
+        distance=[3],
+        rounds=1,
+        shots=10,
+        backend=["stim"],
+        decoder=["local"],
+        p=[0.01],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="new",
+    )
+    run_sweep(**args)
+    run_sweep(resume=True, **args)
+    df = pd.read_csv(out, dtype={"git_sha": str})
+    assert list(df.columns) == CSV_FIELDS
+    assert list(df["run_id"]) == ["old-0000", "new-0000"]
+    assert df.loc[0, "git_sha"] == "0123456"
+    assert df["config_fingerprint"].isna().tolist() == [True, False]
+    assert list(df["seed"]) == [7, 0]
+
+
+def test_cli_sweep_batches_aer_configs(tmp_path):
+    out = tmp_path / "runs.csv"
+    run_sweep(
+        distance=[3],
+        rounds=2,
+        shots=30,
+        backend=["aer", "stim"],
+        decoder=["local", "mwpm"],
+        p=[0.01, 0.02],
+        seed=3,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="batch",
+        aer_batch=True,
+    )
+    df = pd.read_csv(out).sort_values("run_id", ignore_index=True)
+    assert list(df["run_id"]) == [f"batch-{idx:04d}" for idx in range(8)]
+    assert df["logical_error_rate"].between(0, 1).all()
+    configs = cli._sweep_configs(
+        distances=[3],
+        p_values=[0.01, 0.02],
+        backends=["aer", "stim"],
+        decoders=["local", "mwpm"],
+        rounds=2,
+        shots=30,
+        px=None,
+        py=None,
+        pz=None,
+        readout_error=0.0,
+        readout_error_0to1=None,
+        readout_error_1to0=None,
+        base_seed=3,
+    )
+    assert list(df["seed"]) == [cfg.seed for cfg in configs]
+    aer = df["backend"] == "aer"
+    assert df.loc[aer, "aer_seed"].notna().all()
+    assert df.loc[~aer, "aer_seed"].isna().all()
+
+
+def test_cli_sweep_adaptive_records_shots_used(tmp_path):
+    out = tmp_path / "runs.csv"
+    run_sweep(
+        distance=[3],
+        rounds=2,
+        shots=100,
+        backend=["stim"],
+        decoder=["mwpm"],
+        p=[0.02],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="adaptive",
+        min_failures=5,
+        max_shots=2000,
+    )
+    row = pd.read_csv(out).iloc[0]
+    assert row["shots"] % 100 == 0
+    assert 100 <= row["shots"] <= 2000
+
+
+def test_cli_sweep_ci_method_brackets_rate(tmp_path):
+    out = tmp_path / "runs.csv"
+    for method in ("wilson", "clopper-pearson"):
+        run_sweep(
+            distance=[3],
+            rounds=2,
+            shots=200,
+            backend=["stim"],
+            decoder=["local"],
+            p=[0.02],
+            seed=0,
+            jobs=1,
+            output=out,
+            git_sha="abc",
+            run_prefix=method,
+            ci_method=method,
+        )
+    df = pd.read_csv(out)
+    assert (df["ci_low"] <= df["logical_error_rate"]).all()
+    assert (df["logical_error_rate"] <= df["ci_high"]).all()
+    assert df["logical_error_rate"].nunique() == 1
+
+
+def test_cli_sweep_resume_skips_finished_configs(tmp_path):
+    out = tmp_path / "runs.csv"
+    args = dict(
+        rounds=1,
+        shots=10,
+        backend=["stim"],
+        decoder=["local"],
+        p=[0.01],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="resume",
+    )
+    run_sweep(distance=[3], **args)
+    run_sweep(distance=[3, 5], resume=True, **args)
+    df = pd.read_csv(out)
+    assert list(df["distance"]) == [3, 5]
+    assert df["config_fingerprint"].is_unique
+    run_sweep(distance=[3, 5], resume=True, **args)
+    assert len(pd.read_csv(out)) == 2
+
+
+def test_cli_sweep_samples_each_point_once_for_all_decoders(tmp_path, monkeypatch):
+    calls = []
+    original = cli._sample_backend
+
+    def counting(config, options):
+        calls.append((config.distance, config.noise.p, config.seed))
+        return original(config, options)
+
+    monkeypatch.setattr(cli, "_sample_backend", counting)
+    out = tmp_path / "runs.csv"
+    run_sweep(
+        distance=[3],
+        rounds=2,
+        shots=30,
+        backend=["stim"],
+        decoder=["local", "mwpm"],
+        p=[0.01, 0.02],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="shared",
+    )
+    assert sorted(calls) == [(3, 0.01, 0), (3, 0.02, 1)]
+    df = pd.read_csv(out).sort_values("run_id", ignore_index=True)
+    assert list(df["run_id"]) == [f"shared-{idx:04d}" for idx in range(4)]
+    assert list(df["seed"]) == [0, 1, 0, 1]
+
+
+def test_cli_sweep_stim_detectors_match_measurement_sampling_for_mwpm(tmp_path):
+    args = dict(
+        distance=[3],
+        rounds=3,
+        shots=200,
+        backend=["stim"],
+        decoder=["mwpm"],
+        p=[0.02],
+        seed=4,
+        jobs=1,
+        git_sha="abc",
+        run_prefix="native",
+    )
+    run_sweep(output=tmp_path / "meas.csv", **args)
+    run_sweep(output=tmp_path / "native.csv", stim_detectors=True, **args)
+    meas = pd.read_csv(tmp_path / "meas.csv").iloc[0]
+    native = pd.read_csv(tmp_path / "native.csv").iloc[0]
+    assert meas["logical_error_rate"] == native["logical_error_rate"]
+
+
+def test_cli_sweep_rejects_stim_detectors_for_local_decoder(tmp_path):
+    with pytest.raises(ValueError, match="mwpm"):
+        run_sweep(
+            distance=[3],
+            rounds=2,
+            shots=20,
+            backend=["stim"],
+            decoder=["mwpm", "local"],
+            p=[0.01],
+            output=tmp_path / "runs.csv",
+            git_sha="abc",
+            stim_detectors=True,
+        )
+    assert not (tmp_path / "runs.csv").exists()
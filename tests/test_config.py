@@ -60,3 +60,15 @@ def test_figure_command_serialization():
     line = entry.serialize()
     assert "figs/demo.png" in line
     assert "seed=5" in line
+
+
+def test_experiment_fingerprint_tracks_config_and_git_sha():
+    noise = NoiseParams(model="depolarizing", p=0.01)
+    cfg = ExperimentConfig(distance=3, rounds=2, shots=10, noise=noise, seed=1)
+    same = ExperimentConfig(
+        distance=3, rounds=2, shots=10, noise=NoiseParams(model="depolarizing", p=0.01), seed=1
+    )
+    assert cfg.fingerprint("abc") == same.fingerprint("abc")
+    assert cfg.fingerprint("abc") != cfg.fingerprint("def")
+    reseeded = ExperimentConfig(distance=3, rounds=2, shots=10, noise=noise, seed=2)
+    assert cfg.fingerprint("abc") != reseeded.fingerprint("abc")
@@ -32,3 +32,18 @@ def test_local_decoder_parity_flags_detection():
     out = dec.decode(synd)
     assert out["z_logical"][0] == 1
     assert out["x_logical"][1] == 1
+
+
+def test_local_decoder_accepts_packed_syndromes():
+    rng = np.random.default_rng(0)
+    x_meas = rng.integers(0, 2, size=(6, 2, 3), dtype=np.uint8)
+    z_meas = np.zeros((6, 2, 3), dtype=np.uint8)
+    synd = SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+    packed = synd.pack()
+    assert packed.x_detection.shape == (6, 2, 1)
+    assert np.array_equal(packed.unpack().x_detection, synd.x_detection)
+    dec = LocalDecoder()
+    out = dec.decode(synd)
+    out_packed = dec.decode(packed)
+    assert np.array_equal(out["z_logical"], out_packed["z_logical"])
+    assert np.array_equal(out["x_logical"], out_packed["x_logical"])
@@ -1,7 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import stim
 
-from surface_code_sim.decoders import MwpmDecoder
+from surface_code_sim.decoders import (
+    DecodeCache,
+    MwpmDecoder,
+    clear_matching_cache,
+    matching_cache_info,
+    mwpm,
+)
 from surface_code_sim.qiskit_frontend import SampledSyndromes, build_layout
+from surface_code_sim.stim_backend import build_stim_memory_circuit, sample_syndromes_stim
+from surface_code_sim.utils import ExperimentConfig, NoiseParams
 
 
 def test_mwpm_decoder_zero_syndrome_no_failures():
@@ -24,3 +35,188 @@ def test_mwpm_decoder_same_seed_determinism():
     synd = SampledSyndromes(x_meas=x_det, z_meas=z_det)
     out = dec.decode(synd)
     assert out["z_logical"][0] in (0, 1)
+
+
+def test_mwpm_decoder_packed_matches_unpacked():
+    layout = build_layout(5)
+    rng = np.random.default_rng(3)
+    x_meas = rng.integers(0, 2, size=(8, 3, len(layout.x_stabilizers)), dtype=np.uint8)
+    z_meas = rng.integers(0, 2, size=(8, 3, len(layout.z_stabilizers)), dtype=np.uint8)
+    synd = SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+    dec = MwpmDecoder(layout)
+    out = dec.decode(synd)
+    out_packed = dec.decode(synd.pack())
+    assert np.array_equal(out["x_logical"], out_packed["x_logical"])
+    assert np.array_equal(out["z_logical"], out_packed["z_logical"])
+
+
+def test_mwpm_boundary_graph_has_one_node_per_detector():
+    clear_matching_cache()
+    layout = build_layout(3)
+    rng = np.random.default_rng(4)
+    x_meas = rng.integers(0, 2, size=(6, 3, len(layout.x_stabilizers)), dtype=np.uint8)
+    z_meas = rng.integers(0, 2, size=(6, 3, len(layout.z_stabilizers)), dtype=np.uint8)
+    MwpmDecoder(layout).decode(SampledSyndromes(x_meas=x_meas, z_meas=z_meas).pack())
+    # Two checks per basis over three rounds; the six padding bits of each packed round
+    # must not become graph nodes.
+    assert matching_cache_info()["boundary"]["size"] == 1
+    assert mwpm._boundary_matching(6).num_detectors == 6
+
+
+def test_mwpm_decoder_matches_stim_detectors():
+    cfg = ExperimentConfig(
+        distance=5,
+        rounds=3,
+        shots=400,
+        noise=NoiseParams(model="depolarizing", p=0.002, readout_error=0.0),
+        decoder="mwpm",
+        backend="stim",
+        seed=4,
+    )
+    synd = sample_syndromes_stim(cfg)
+    assert synd.detectors.shape == (cfg.shots, synd.detector_count)
+    dec = MwpmDecoder.from_config(cfg)
+    out = dec.decode(synd)
+    raw_flips = int(synd.observable_flips()[:, 0].sum())
+    assert int(out["x_logical"].sum()) <= raw_flips
+    out_packed = dec.decode(sample_syndromes_stim(cfg, packed=True))
+    assert np.array_equal(out["x_logical"], out_packed["x_logical"])
+
+
+def test_mwpm_decoder_corrects_single_data_error():
+    circuit = stim.Circuit()
+    cfg_noise = NoiseParams(model="depolarizing", p=0.01)
+    base, _, _ = build_stim_memory_circuit(3, 2, cfg_noise)
+    dec = MwpmDecoder.from_circuit(base, 3)
+    # An X error on the centre data qubit flips the two Z checks it touches in the first
+    # round; matching should pair them without predicting a logical flip.
+    circuit.append("X_ERROR", [4], 1.0)
+    circuit += base.without_noise()
+    dets, obs = circuit.compile_detector_sampler().sample(1, separate_observables=True)
+    synd = SampledSyndromes(
+        x_meas=np.zeros((1, 2, 2), dtype=np.uint8),
+        z_meas=np.zeros((1, 2, 2), dtype=np.uint8),
+        detectors=dets.astype(np.uint8),
+        observables=obs.astype(np.uint8),
+    )
+    assert dets.any()
+    assert dec.decode(synd)["x_logical"][0] == 0
+
+
+def test_mwpm_matching_graphs_are_cached_across_decoders():
+    clear_matching_cache()
+    noise = NoiseParams(model="depolarizing", p=0.01)
+    first = MwpmDecoder.from_stim_memory(3, 2, noise)
+    second = MwpmDecoder.from_stim_memory(3, 2, NoiseParams(model="depolarizing", p=0.01))
+    assert first.matching is second.matching
+    layout = build_layout(3)
+    synd = SampledSyndromes(
+        x_meas=np.zeros((2, 2, len(layout.x_stabilizers)), dtype=np.uint8),
+        z_meas=np.zeros((2, 2, len(layout.z_stabilizers)), dtype=np.uint8),
+    )
+    MwpmDecoder(layout).decode(synd)
+    MwpmDecoder(layout).decode(synd)
+    info = matching_cache_info()
+    assert (info["dem"]["hits"], info["dem"]["misses"], info["dem"]["size"]) == (1, 1, 1)
+    assert info["dem"]["build_seconds"] > 0
+    assert info["boundary"]["misses"] == 1
+    assert info["boundary"]["hits"] == 3
+
+
+def test_mwpm_sharded_decode_matches_serial(monkeypatch):
+    monkeypatch.setattr(mwpm, "_MIN_SHARD_SHOTS", 1)
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=3,
+        shots=301,
+        noise=NoiseParams(model="depolarizing", p=0.02, readout_error=0.01),
+        decoder="mwpm",
+        backend="stim",
+        seed=9,
+    )
+    for packed in (False, True):
+        synd = sample_syndromes_stim(cfg, packed=packed)
+        serial = MwpmDecoder.from_config(cfg).decode(synd)
+        sharded = MwpmDecoder.from_config(cfg, workers=3).decode(synd)
+        assert np.array_equal(serial["x_logical"], sharded["x_logical"])
+
+
+def test_mwpm_sharded_boundary_decode_matches_serial(monkeypatch):
+    monkeypatch.setattr(mwpm, "_MIN_SHARD_SHOTS", 1)
+    rng = np.random.default_rng(4)
+    x_meas = rng.integers(0, 2, size=(257, 3, 4), dtype=np.uint8)
+    z_meas = rng.integers(0, 2, size=(257, 3, 4), dtype=np.uint8)
+    synd = SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+    for sample in (synd, synd.pack()):
+        serial = MwpmDecoder.from_distance(3).decode(sample)
+        sharded = MwpmDecoder.from_distance(3, workers=3).decode(sample)
+        for name in ("x_logical", "z_logical"):
+            assert np.array_equal(serial[name], sharded[name])
+
+
+def test_mwpm_decode_cache_matches_uncached_and_counts_hits():
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=500,
+        noise=NoiseParams(model="depolarizing", p=0.005, readout_error=0.0),
+        decoder="mwpm",
+        backend="stim",
+        seed=12,
+    )
+    synd = sample_syndromes_stim(cfg)
+    plain = MwpmDecoder.from_config(cfg).decode(synd)
+    cached_dec = MwpmDecoder.from_config(cfg, cache_size=4)
+    first = cached_dec.decode(synd)
+    second = cached_dec.decode(synd.pack())
+    assert np.array_equal(plain["x_logical"], first["x_logical"])
+    assert np.array_equal(plain["x_logical"], second["x_logical"])
+    assert len(cached_dec.cache) <= 4
+    # Every shot is decoded once by the matcher or served without it: trivial rows and
+    # in-batch repeats on the first call, plus at most four table hits on the second.
+    assert first["cache_shots"] == second["cache_shots"] == cfg.shots
+    assert 0 < first["cache_served"] < cfg.shots
+    assert 0 <= second["cache_served"] - first["cache_served"] <= 4
+    served = first["cache_served"] + second["cache_served"]
+    assert cached_dec.cache_stats() == (served, 2 * cfg.shots)
+
+
+def test_decode_cache_skips_trivial_rows_and_evicts_oldest():
+    cache = DecodeCache(max_entries=2)
+    rows = np.array([[1, 0], [0, 1], [1, 1], [0, 0], [1, 0]], dtype=np.uint8)
+    calls = []
+
+    def predict(packed_rows):
+        calls.append(len(packed_rows))
+        return packed_rows[:, :1].copy()
+
+    out, served, shots = cache.decode(rows, packed=False, width=1, predict=predict)
+    assert calls == [3]
+    assert out[:, 0].tolist() == [1, 2, 3, 0, 1]
+    assert len(cache) == 2
+    # The all-zero row and the in-batch repeat of [1, 0] skip the matcher.
+    assert (served, shots) == (2, 5)
+    _, served, shots = cache.decode(rows[[2, 3]], packed=False, width=1, predict=predict)
+    assert calls == [3]
+    assert (served, shots) == (2, 2)
+    assert cache.stats() == (4, 7)
+    assert cache.hit_rate == 4 / 7
+
+
+def test_decode_cache_is_safe_to_share_across_threads():
+    cache = DecodeCache(max_entries=8)
+    rng = np.random.default_rng(9)
+    batches = [rng.integers(0, 2, size=(200, 2), dtype=np.uint8) for _ in range(32)]
+
+    def predict(packed_rows):
+        return packed_rows[:, :1].copy()
+
+    def run(rows):
+        out, served, shots = cache.decode(rows, packed=True, width=1, predict=predict)
+        assert np.array_equal(out, rows[:, :1])
+        return served, shots
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        counts = list(pool.map(run, batches * 4))
+    assert len(cache) <= 8
+    assert cache.stats() == tuple(map(sum, zip(*counts, strict=True)))
@@ -1,7 +1,16 @@
 import numpy as np
 import pandas as pd
+import pytest
 
-from surface_code_sim.plotting import bootstrap_ci, logical_error_curve
+from surface_code_sim.plotting import (
+    _row_intervals,
+    binomial_bootstrap_ci,
+    binomial_ci,
+    bootstrap_ci,
+    clopper_pearson_ci,
+    logical_error_curve,
+    wilson_ci,
+)
 
 
 def test_bootstrap_ci_returns_bounds():
@@ -10,6 +19,11 @@ def test_bootstrap_ci_returns_bounds():
     assert 0 <= low <= high <= 1
 
 
+def test_bootstrap_ci_of_empty_data_has_no_bounds():
+    assert bootstrap_ci(np.array([])) == (None, None)
+    assert binomial_bootstrap_ci(0, 0) == (None, None)
+
+
 def test_logical_error_curve_writes_file(tmp_path):
     df = pd.DataFrame(
         {
@@ -21,3 +35,65 @@ def test_logical_error_curve_writes_file(tmp_path):
     out = tmp_path / "fig.png"
     logical_error_curve(df, distances=[3, 5], output=out, title="demo", seed=0, x_field="p")
     assert out.exists()
+
+
+def test_binomial_bootstrap_ci_brackets_rate():
+    low, high = binomial_bootstrap_ci(30, 1000, num_samples=2000, alpha=0.05, seed=0)
+    assert low < 0.03 < high
+    assert binomial_bootstrap_ci(0, 50, seed=0) == (0.0, 0.0)
+
+
+def test_wilson_ci_matches_closed_form():
+    low, high = wilson_ci(10, 100, alpha=0.05)
+    assert low == pytest.approx(0.05523, abs=1e-4)
+    assert high == pytest.approx(0.17437, abs=1e-4)
+    assert wilson_ci(0, 100)[0] == pytest.approx(0.0)
+
+
+def test_wilson_ci_is_exact_at_the_extremes():
+    assert wilson_ci(0, 500)[0] == 0.0
+    assert wilson_ci(500, 500)[1] == 1.0
+
+
+def test_clopper_pearson_ci_covers_edges():
+    low, high = clopper_pearson_ci(10, 100, alpha=0.05)
+    assert low == pytest.approx(0.04900, abs=1e-4)
+    assert high == pytest.approx(0.17622, abs=1e-4)
+    assert clopper_pearson_ci(0, 50)[0] == 0.0
+    assert clopper_pearson_ci(50, 50)[1] == 1.0
+
+
+def test_binomial_ci_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        binomial_ci(1, 10, method="jeffreys")
+
+
+def test_bootstrap_ci_uses_binomial_draws_for_binary_data():
+    data = np.zeros(1000, dtype=np.uint8)
+    data[:30] = 1
+    expected = binomial_bootstrap_ci(30, 1000, num_samples=2000, seed=4)
+    assert bootstrap_ci(data, num_samples=2000, seed=4) == expected
+
+
+def test_bootstrap_ci_blocks_match_single_draw():
+    data = np.random.default_rng(1).normal(size=500)
+    whole = bootstrap_ci(data, num_samples=300, seed=2)
+    blocked = bootstrap_ci(data, num_samples=300, seed=2, max_bytes=16 * 500 * 7)
+    assert whole == blocked
+
+
+def test_row_intervals_prefer_stored_bounds_and_fill_from_shots():
+    rows = pd.DataFrame(
+        {
+            "logical_error_rate": [0.1, 0.1, 0.2],
+            "shots": [100, 100, 10],
+            "ci_low": [0.05, np.nan, np.nan],
+            "ci_high": [0.15, np.nan, np.nan],
+        }
+    )
+    low, high = _row_intervals(rows)
+    assert (low[0], high[0]) == (0.05, 0.15)
+    assert (low[1], high[1]) == pytest.approx(wilson_ci(10, 100))
+    assert (low[2], high[2]) == pytest.approx(wilson_ci(2, 10))
+    bare_low, bare_high = _row_intervals(rows[["logical_error_rate"]])
+    assert np.isnan(bare_low).all() and np.isnan(bare_high).all()
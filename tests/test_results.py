@@ -0,0 +1,149 @@
+import os
+
+import pandas as pd
+import pytest
+from typer.testing import CliRunner
+
+from surface_code_sim import results
+from surface_code_sim.cli import app, run_sweep
+from surface_code_sim.results import (
+    ResultWriter,
+    compact_results,
+    completed_fingerprints,
+    read_results,
+    write_results,
+)
+from surface_code_sim.utils import CSV_FIELDS
+
+pytest.importorskip("pyarrow")
+
+
+def _row(run_id: str, decoder: str, distance: int, p: float) -> dict:
+    row = {field: None for field in CSV_FIELDS}
+    row.update(
+        run_id=run_id,
+        git_sha="abc",
+        seed=0,
+        distance=distance,
+        rounds=2,
+        shots=100,
+        decoder=decoder,
+        backend="stim",
+        p=p,
+        readout_error=0.0,
+        logical_error_rate=0.1,
+        ci_low=0.05,
+        ci_high=0.15,
+        wall_time_seconds=0.5,
+        timestamp_utc="2024-01-01T00:00:00+00:00",
+    )
+    return row
+
+
+def test_write_results_partitions_and_reads_back(tmp_path):
+    rows = [_row("a", "mwpm", 3, 0.001), _row("b", "local", 3, 0.002), _row("c", "mwpm", 5, 0.001)]
+    written = write_results(rows, tmp_path)
+    assert len(written) == 3
+    assert (tmp_path / "backend=stim" / "decoder=mwpm" / "distance=5").is_dir()
+    assert not list(tmp_path.rglob("*.tmp"))
+    df = read_results(tmp_path)
+    assert list(df.columns) == CSV_FIELDS
+    assert sorted(df["run_id"]) == ["a", "b", "c"]
+    assert df["distance"].dtype == "int64"
+    assert df["px"].isna().all()
+
+
+def test_read_results_applies_filters_and_columns(tmp_path):
+    write_results([_row("a", "mwpm", 3, 0.001), _row("b", "local", 3, 0.002)], tmp_path)
+    write_results([_row("c", "mwpm", 5, 0.01)], tmp_path)
+    filters = [("decoder", "==", "mwpm"), ("p", "<", 0.005)]
+    df = read_results(tmp_path, filters=filters, columns=["run_id", "distance"])
+    assert list(df.columns) == ["run_id", "distance"]
+    assert df["run_id"].tolist() == ["a"]
+
+
+def test_cli_sweep_writes_parquet_store(tmp_path):
+    out = tmp_path / "runs"
+    run_sweep(
+        distance=[3],
+        rounds=1,
+        shots=20,
+        backend=["stim"],
+        decoder=["local", "mwpm"],
+        p=[0.01],
+        seed=0,
+        jobs=1,
+        output=out,
+        git_sha="abc",
+        run_prefix="pq",
+        output_format="parquet",
+    )
+    df = read_results(out)
+    assert isinstance(df, pd.DataFrame)
+    assert sorted(df["decoder"]) == ["local", "mwpm"]
+
+
+def test_cli_sweep_writes_parquet_per_task_then_compacts(tmp_path):
+    out = tmp_path / "runs"
+    run_sweep(
+        distance=[3],
+        rounds=1,
+        shots=20,
+        backend=["stim"],
+        decoder=["local", "mwpm"],
+        p=[0.01, 0.02, 0.03],
+        seed=0,
+        jobs=2,
+        executor="thread",
+        output=out,
+        git_sha="abc",
+        run_prefix="pq",
+        output_format="parquet",
+    )
+    # Three sweep points, each written into both decoder partitions as it finished.
+    assert len(list(out.rglob("*.parquet"))) == 6
+    result = CliRunner().invoke(app, ["compact", str(out)])
+    assert result.exit_code == 0, result.output
+    assert len(list(out.rglob("*.parquet"))) == 2
+    assert sorted(read_results(out)["run_id"]) == [f"pq-{idx:04d}" for idx in range(6)]
+
+
+def test_result_writer_writes_parquet_on_every_add(tmp_path):
+    with ResultWriter(tmp_path, "parquet") as writer:
+        writer.add([_row("a", "mwpm", 3, 0.001)])
+        assert len(list(tmp_path.rglob("*.parquet"))) == 1
+        writer.add([_row("b", "mwpm", 3, 0.002), _row("c", "local", 3, 0.003)])
+        assert len(list(tmp_path.rglob("*.parquet"))) == 3
+    assert writer.written == 3
+    assert sorted(read_results(tmp_path)["run_id"]) == ["a", "b", "c"]
+
+
+def test_compact_results_finishes_an_interrupted_swap(tmp_path, monkeypatch):
+    for run_id in "abc":
+        write_results([_row(run_id, "mwpm", 3, 0.001)], tmp_path)
+    rename = os.rename
+    calls = []
+
+    def crash_on_second_rename(src, dst):
+        calls.append(src)
+        if len(calls) == 2:
+            raise OSError("killed")
+        rename(src, dst)
+
+    monkeypatch.setattr(results.os, "rename", crash_on_second_rename)
+    with pytest.raises(OSError):
+        compact_results(tmp_path)
+    monkeypatch.setattr(results.os, "rename", rename)
+    assert len(read_results(tmp_path)) == 0
+    assert compact_results(tmp_path) == []
+    assert len(list(tmp_path.rglob("*.parquet"))) == 1
+    assert sorted(read_results(tmp_path)["run_id"]) == ["a", "b", "c"]
+    assert [path.name for path in tmp_path.rglob(".*")] == []
+
+
+def test_completed_fingerprints_reads_parquet_store(tmp_path):
+    row = _row("a", "mwpm", 3, 0.001)
+    row["config_fingerprint"] = "f00"
+    write_results([row, _row("b", "mwpm", 3, 0.002)], tmp_path)
+    assert completed_fingerprints(tmp_path, "parquet") == {"f00"}
+    assert completed_fingerprints(tmp_path / "missing", "parquet") == set()
@@ -1,6 +1,18 @@
+from dataclasses import replace
+
 import numpy as np
 
-from surface_code_sim.qiskit_frontend import sample_syndromes
+from surface_code_sim.decoders import LocalDecoder
+from surface_code_sim.qiskit_frontend import (
+    SampledSyndromes,
+    aer_cache_info,
+    clear_aer_cache,
+    sample_syndromes,
+    sample_syndromes_batch,
+    sampler,
+)
+from surface_code_sim.qiskit_frontend.sampler import _bits_from_memory
+from surface_code_sim.streaming import failure_counts
 from surface_code_sim.utils import ExperimentConfig, NoiseParams
 
 
@@ -35,3 +47,124 @@ def test_sample_syndromes_is_deterministic_with_seed():
     assert np.array_equal(synd1.z_meas, synd2.z_meas)
     assert np.array_equal(synd1.x_detection, synd2.x_detection)
     assert np.array_equal(synd1.z_detection, synd2.z_detection)
+
+
+def test_sample_syndromes_packed_in_blocks_matches_unpacked(monkeypatch):
+    monkeypatch.setattr(sampler, "PACK_BLOCK_SHOTS", 4)
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=10,
+        noise=NoiseParams(model="depolarizing", p=0.05, readout_error=0.0),
+        decoder="mwpm",
+        backend="aer",
+        seed=6,
+    )
+    synd = sample_syndromes(cfg)
+    packed = sample_syndromes(cfg, packed=True)
+    assert packed.packed and packed.x_count == synd.x_count
+    assert np.array_equal(packed.x_meas, synd.pack().x_meas)
+    assert np.array_equal(packed.z_meas, synd.pack().z_meas)
+
+
+def test_sample_syndromes_reuses_transpiled_circuit_and_noise_model():
+    clear_aer_cache()
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=20,
+        noise=NoiseParams(model="depolarizing", p=0.05, readout_error=0.01),
+        decoder="local",
+        backend="aer",
+        seed=1,
+    )
+    first = sample_syndromes(cfg)
+    second = sample_syndromes(replace(cfg, seed=2))
+    sample_syndromes(
+        replace(cfg, noise=NoiseParams(model="depolarizing", p=0.01, readout_error=0.01))
+    )
+    info = aer_cache_info()
+    assert info["circuits"]["misses"] == 1
+    assert info["circuits"]["hits"] == 2
+    assert info["noise_models"]["misses"] == 2
+    assert not np.array_equal(first.x_meas, second.x_meas)
+
+
+def test_sampled_syndromes_detection_is_lazy_and_droppable():
+    rng = np.random.default_rng(11)
+    x_meas = rng.integers(0, 2, size=(4, 3, 2), dtype=np.uint8)
+    z_meas = rng.integers(0, 2, size=(4, 3, 2), dtype=np.uint8)
+    expected = SampledSyndromes(x_meas=x_meas.copy(), z_meas=z_meas.copy())
+    synd = SampledSyndromes(x_meas=x_meas, z_meas=z_meas)
+    assert synd._x_detection is None and synd._z_detection is None
+    synd.drop_measurements()
+    assert synd.x_meas is None and synd.z_meas is None
+    assert synd.x_detection is x_meas
+    assert np.array_equal(synd.x_detection, expected.x_detection)
+    assert np.array_equal(synd.z_detection, expected.z_detection)
+    assert synd.shots == 4 and synd.rounds == 3
+
+
+def test_bits_from_memory_matches_per_shot_parsing():
+    rng = np.random.default_rng(5)
+    rounds, x_count, z_count = 3, 2, 4
+    raw = rng.integers(0, 2, size=(7, rounds * (x_count + z_count)), dtype=np.uint8)
+    memory = []
+    for row in raw:
+        mx = "".join(str(b) for b in row[: rounds * x_count][::-1])
+        mz = "".join(str(b) for b in row[rounds * x_count :][::-1])
+        memory.append(f"{mz} {mx}")
+    x_bits, z_bits = _bits_from_memory(memory, rounds, x_count, z_count)
+    assert np.array_equal(x_bits, raw[:, : rounds * x_count].reshape(7, rounds, x_count))
+    assert np.array_equal(z_bits, raw[:, rounds * x_count :].reshape(7, rounds, z_count))
+
+
+def test_sample_syndromes_counts_mode_matches_memory_histogram():
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=200,
+        noise=NoiseParams(model="depolarizing", p=0.01, readout_error=0.0),
+        decoder="local",
+        backend="aer",
+        seed=3,
+    )
+    per_shot = sample_syndromes(cfg)
+    grouped = sample_syndromes(cfg, counts=True)
+    assert grouped.total_shots == cfg.shots
+    assert grouped.shots == len(grouped.weights) < cfg.shots
+    dec = LocalDecoder()
+    assert failure_counts(dec.decode(grouped), grouped) == failure_counts(
+        dec.decode(per_shot), per_shot
+    )
+
+
+def test_sample_syndromes_batch_matches_single_runs_at_recorded_seeds():
+    noise = NoiseParams(model="depolarizing", p=0.05, readout_error=0.01)
+    configs = [
+        ExperimentConfig(
+            distance=3, rounds=2, shots=30, noise=noise, decoder="local", backend="aer", seed=4
+        ),
+        ExperimentConfig(
+            distance=3, rounds=3, shots=30, noise=noise, decoder="local", backend="aer", seed=5
+        ),
+        ExperimentConfig(
+            distance=3,
+            rounds=2,
+            shots=30,
+            noise=NoiseParams(model="depolarizing", p=0.01, readout_error=0.0),
+            decoder="local",
+            backend="aer",
+            seed=6,
+        ),
+    ]
+    batched = sample_syndromes_batch(configs)
+    assert [synd.rounds for _, synd in batched] == [2, 3, 2]
+    assert batched[0][0] == 4
+    assert batched[1][0] != 5
+    assert batched[2][0] == 6
+    assert [cfg.seed for cfg in configs] == [4, 5, 6]
+    for cfg, (aer_seed, synd) in zip(configs, batched, strict=True):
+        single = sample_syndromes(replace(cfg, seed=aer_seed))
+        assert np.array_equal(synd.x_meas, single.x_meas)
+        assert np.array_equal(synd.z_meas, single.z_meas)
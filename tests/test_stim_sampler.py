@@ -1,7 +1,18 @@
 import numpy as np
 import pytest
+import stim
 
-from surface_code_sim.stim_backend import sample_syndromes_stim
+from surface_code_sim.qiskit_frontend import build_layout
+from surface_code_sim.qiskit_frontend import sampler as qiskit_sampler
+from surface_code_sim.qiskit_frontend.sampler import pack_bits
+from surface_code_sim.stim_backend import (
+    build_stim_memory_circuit,
+    cached_stim_memory_circuit,
+    circuit_cache_info,
+    clear_circuit_cache,
+    sample_detections_stim,
+    sample_syndromes_stim,
+)
 from surface_code_sim.utils import ExperimentConfig, NoiseParams
 
 
@@ -48,3 +59,210 @@ def test_stim_syndromes_rejects_asymmetric_readout():
     )
     with pytest.raises(ValueError):
         sample_syndromes_stim(cfg)
+
+
+def test_stim_syndromes_split_matches_measurement_record():
+    cfg = ExperimentConfig(
+        distance=5,
+        rounds=3,
+        shots=6,
+        noise=NoiseParams(model="depolarizing", p=0.05, readout_error=0.02),
+        decoder="mwpm",
+        backend="stim",
+        seed=7,
+    )
+    synd = sample_syndromes_stim(cfg)
+    circuit, x_count, z_count = build_stim_memory_circuit(cfg.distance, cfg.rounds, cfg.noise)
+    raw = circuit.compile_sampler(seed=cfg.seed).sample(shots=cfg.shots).astype(np.uint8)
+    for r in range(cfg.rounds):
+        offset = r * (z_count + x_count)
+        assert np.array_equal(synd.z_meas[:, r, :], raw[:, offset : offset + z_count])
+        assert np.array_equal(
+            synd.x_meas[:, r, :], raw[:, offset + z_count : offset + z_count + x_count]
+        )
+
+
+def test_stim_syndromes_packed_matches_unpacked():
+    cfg = ExperimentConfig(
+        distance=5,
+        rounds=2,
+        shots=10,
+        noise=NoiseParams(model="depolarizing", p=0.05, readout_error=0.0),
+        decoder="mwpm",
+        backend="stim",
+        seed=5,
+    )
+    synd = sample_syndromes_stim(cfg)
+    packed = sample_syndromes_stim(cfg, packed=True)
+    assert packed.packed
+    assert packed.x_meas.nbytes * 8 >= synd.x_meas.size
+    assert np.array_equal(packed.unpack().x_detection, synd.x_detection)
+    assert np.array_equal(packed.unpack().z_detection, synd.z_detection)
+
+
+def test_stim_syndromes_packed_in_blocks_matches_unpacked(monkeypatch):
+    monkeypatch.setattr(qiskit_sampler, "PACK_BLOCK_SHOTS", 3)
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=3,
+        shots=10,
+        noise=NoiseParams(model="depolarizing", p=0.05, readout_error=0.0),
+        decoder="mwpm",
+        backend="stim",
+        seed=8,
+    )
+    synd = sample_syndromes_stim(cfg)
+    packed = sample_syndromes_stim(cfg, packed=True)
+    assert np.array_equal(packed.x_meas, pack_bits(synd.x_meas))
+    assert np.array_equal(packed.z_meas, pack_bits(synd.z_meas))
+    assert np.array_equal(packed.detectors, pack_bits(synd.detectors))
+
+
+def test_stim_circuit_cache_hits_on_repeated_points():
+    clear_circuit_cache()
+    noise = NoiseParams(model="depolarizing", p=0.01, readout_error=0.0)
+    cfgs = [
+        ExperimentConfig(
+            distance=3, rounds=2, shots=4, noise=noise, decoder="mwpm", backend="stim", seed=seed
+        )
+        for seed in (1, 2, 1)
+    ]
+    samples = [sample_syndromes_stim(cfg) for cfg in cfgs]
+    info = circuit_cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+    assert np.array_equal(samples[0].x_meas, samples[2].x_meas)
+    circuit, _, _ = cached_stim_memory_circuit(3, 2, NoiseParams(model="depolarizing", p=0.01))
+    assert circuit == build_stim_memory_circuit(3, 2, noise)[0]
+
+
+def _one_stabilizer_at_a_time(distance: int, rounds: int, noise: NoiseParams) -> stim.Circuit:
+    # Reference schedule: every stabilizer is reset, entangled and measured before the next.
+    layout = build_layout(distance)
+    data_count = len(layout.data_indices)
+    z_count = len(layout.z_stabilizers)
+    p = noise.readout_error
+
+    def two_qubit_noise(circuit, q0, q1):
+        if noise.model == "depolarizing":
+            circuit.append("DEPOLARIZE2", [q0, q1], noise.p)
+        else:
+            circuit.append("PAULI_CHANNEL_1", [q0, q1], [noise.px, noise.py, noise.pz])
+
+    def one_qubit_noise(circuit, q):
+        if noise.model == "depolarizing":
+            circuit.append("DEPOLARIZE1", [q], noise.p)
+        else:
+            circuit.append("PAULI_CHANNEL_1", [q], [noise.px, noise.py, noise.pz])
+
+    circuit = stim.Circuit()
+    for _ in range(rounds):
+        for idx, stab in enumerate(layout.z_stabilizers):
+            anc = data_count + idx
+            circuit.append("R", [anc])
+            for q in stab:
+                circuit.append("CX", [q, anc])
+                two_qubit_noise(circuit, q, anc)
+            circuit.append("X_ERROR", [anc], p)
+            circuit.append("M", [anc])
+        for idx, stab in enumerate(layout.x_stabilizers):
+            anc = data_count + z_count + idx
+            circuit.append("R", [anc])
+            circuit.append("H", [anc])
+            one_qubit_noise(circuit, anc)
+            for q in stab:
+                circuit.append("CX", [anc, q])
+                two_qubit_noise(circuit, anc, q)
+            circuit.append("H", [anc])
+            one_qubit_noise(circuit, anc)
+            circuit.append("X_ERROR", [anc], p)
+            circuit.append("M", [anc])
+    circuit.append("X_ERROR", layout.data_indices, p)
+    circuit.append("M", layout.data_indices)
+    return circuit
+
+
+def _operations_per_qubit(circuit: stim.Circuit) -> tuple[dict, list]:
+    ops: dict[int, list] = {}
+    measured = []
+    for inst in circuit.flattened():
+        if inst.name in ("DETECTOR", "OBSERVABLE_INCLUDE"):
+            continue
+        targets = [t.value for t in inst.targets_copy()]
+        args = tuple(inst.gate_args_copy())
+        if inst.name in ("CX", "DEPOLARIZE2"):
+            for pair in zip(targets[::2], targets[1::2], strict=True):
+                for q in pair:
+                    ops.setdefault(q, []).append((inst.name, pair, args))
+        else:
+            for q in targets:
+                ops.setdefault(q, []).append((inst.name, args))
+        if inst.name == "M":
+            measured.extend(targets)
+    return ops, measured
+
+
+@pytest.mark.parametrize(
+    "noise",
+    [
+        NoiseParams(model="depolarizing", p=0.01, readout_error=0.02),
+        NoiseParams(model="biased_pauli", px=0.01, py=0.002, pz=0.03, readout_error=0.02),
+    ],
+)
+@pytest.mark.parametrize("distance", [3, 5])
+def test_stim_circuit_layers_keep_per_stabilizer_order(distance, noise):
+    # Operations on different qubits commute, so matching every qubit's operation sequence
+    # and the measurement order makes the layered circuit equivalent to the reference.
+    layered, _, _ = build_stim_memory_circuit(distance, 3, noise)
+    expected = _one_stabilizer_at_a_time(distance, 3, noise)
+    assert _operations_per_qubit(layered) == _operations_per_qubit(expected)
+
+
+def test_stim_circuit_size_is_independent_of_rounds():
+    noise = NoiseParams(model="depolarizing", p=0.01, readout_error=0.01)
+    short, x_count, z_count = build_stim_memory_circuit(5, 3, noise)
+    long, _, _ = build_stim_memory_circuit(5, 200, noise)
+    assert len(long) == len(short)
+    assert long.num_measurements == 200 * (x_count + z_count) + 25
+    assert long.num_detectors == z_count + 199 * (x_count + z_count) + z_count
+
+
+def test_native_detection_sampling_matches_measurement_path():
+    cfg = ExperimentConfig(
+        distance=3,
+        rounds=4,
+        shots=300,
+        noise=NoiseParams(model="depolarizing", p=0.02, readout_error=0.01),
+        decoder="mwpm",
+        backend="stim",
+        seed=21,
+    )
+    measured = sample_syndromes_stim(cfg)
+    native = sample_detections_stim(cfg)
+    assert native.x_meas is None
+    assert np.array_equal(native.detectors, measured.detectors)
+    assert np.array_equal(native.observables, measured.observables)
+    assert np.array_equal(native.z_detection, measured.z_detection)
+    assert np.array_equal(native.x_detection[:, 1:], measured.x_detection[:, 1:])
+    assert not native.x_detection[:, 0].any()
+    packed = sample_detections_stim(cfg, packed=True)
+    assert np.array_equal(packed.detectors, pack_bits(native.detectors))
+    assert np.array_equal(packed.x_detection, pack_bits(native.x_detection))
+    assert np.array_equal(packed.z_detection, pack_bits(native.z_detection))
+
+
+@pytest.mark.parametrize("distance, rounds", [(3, 1), (5, 3), (7, 5)])
+def test_native_packed_detections_match_unpacked(distance, rounds):
+    cfg = ExperimentConfig(
+        distance=distance,
+        rounds=rounds,
+        shots=200,
+        noise=NoiseParams(model="depolarizing", p=0.03, readout_error=0.02),
+        decoder="mwpm",
+        backend="stim",
+        seed=5,
+    )
+    native = sample_detections_stim(cfg)
+    packed = sample_detections_stim(cfg, packed=True)
+    assert np.array_equal(packed.x_detection, pack_bits(native.x_detection))
+    assert np.array_equal(packed.z_detection, pack_bits(native.z_detection))
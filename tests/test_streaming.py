@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+
+import numpy as np
+import pytest
+
+from surface_code_sim import streaming
+from surface_code_sim.cli import _sample_detections
+from surface_code_sim.decoders import LocalDecoder
+from surface_code_sim.plotting import clopper_pearson_ci
+from surface_code_sim.streaming import (
+    adaptive_failures,
+    chunk_configs,
+    iter_syndrome_chunks,
+    logical_failures,
+    relative_ci_width,
+    stream_failures,
+)
+from surface_code_sim.utils import ExperimentConfig, NoiseParams, RunOptions
+
+
+def _config(shots: int) -> ExperimentConfig:
+    return ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=shots,
+        noise=NoiseParams(model="depolarizing", p=0.02, readout_error=0.01),
+        decoder="local",
+        backend="stim",
+        seed=17,
+    )
+
+
+def test_chunk_configs_cover_all_shots_with_distinct_seeds():
+    chunks = list(chunk_configs(_config(25), chunk_shots=10))
+    assert [c.shots for c in chunks] == [10, 10, 5]
+    assert chunks[0].seed == 17
+    assert len({c.seed for c in chunks}) == 3
+
+
+def test_single_chunk_matches_unchunked_run():
+    cfg = _config(40)
+    sample_fn = partial(_sample_detections, options=RunOptions())
+    decoder = LocalDecoder()
+    failures, shots = stream_failures(cfg, decoder, chunk_shots=40, sample_fn=sample_fn)
+    expected = int(np.count_nonzero(logical_failures(decoder.decode(sample_fn(cfg)))))
+    assert (failures, shots) == (expected, 40)
+
+
+def test_prefetched_chunks_match_inline_chunks():
+    cfg = _config(30)
+    sample_fn = partial(_sample_detections, options=RunOptions(packed=True))
+    inline = list(iter_syndrome_chunks(cfg, 8, sample_fn, prefetch=False))
+    prefetched = list(iter_syndrome_chunks(cfg, 8, sample_fn, prefetch=True))
+    assert [c.shots for c in prefetched] == [8, 8, 8, 6]
+    for a, b in zip(inline, prefetched, strict=True):
+        assert np.array_equal(a.x_detection, b.x_detection)
+        assert np.array_equal(a.z_detection, b.z_detection)
+
+
+def test_prefetch_shares_one_helper_across_streams_and_threads():
+    cfg = _config(30)
+    sample_fn = partial(_sample_detections, options=RunOptions(packed=True))
+    list(iter_syndrome_chunks(cfg, 8, sample_fn))
+    pool = streaming._prefetch_pool()
+
+    def stream(_):
+        return [c.shots for c in iter_syndrome_chunks(cfg, 8, sample_fn)]
+
+    with ThreadPoolExecutor(max_workers=2) as threads:
+        assert list(threads.map(stream, range(2))) == [[8, 8, 8, 6]] * 2
+    assert streaming._prefetch_pool() is pool
+
+
+def test_relative_ci_width_shrinks_with_shots():
+    assert relative_ci_width(0, 100) == float("inf")
+    assert relative_ci_width(10, 1000) > relative_ci_width(100, 10000)
+
+
+def test_relative_ci_width_follows_the_ci_method():
+    low, high = clopper_pearson_ci(10, 1000)
+    width = relative_ci_width(10, 1000, method="clopper-pearson")
+    assert width == pytest.approx((high - low) / 0.01)
+    assert width > relative_ci_width(10, 1000, method="wilson")
+
+
+def test_adaptive_failures_stops_at_min_failures_or_budget():
+    cfg = _config(50)
+    sample_fn = partial(_sample_detections, options=RunOptions())
+    decoder = LocalDecoder()
+    failures, shots = adaptive_failures(
+        cfg, decoder, 50, sample_fn, max_shots=5000, min_failures=1, prefetch=False
+    )
+    assert failures >= 1
+    assert shots % 50 == 0 and shots < 5000
+    full_failures, full_shots = stream_failures(
+        replace(cfg, shots=shots), decoder, 50, sample_fn, prefetch=False
+    )
+    assert (failures, shots) == (full_failures, full_shots)
+    _, capped = adaptive_failures(
+        cfg, decoder, 50, sample_fn, max_shots=120, target_rel_ci=1e-6, prefetch=False
+    )
+    assert capped == 120
+
+
+def test_adaptive_options_require_shot_budget():
+    with pytest.raises(ValueError):
+        RunOptions(min_failures=10)
+    assert RunOptions(target_rel_ci=0.2, max_shots=1000).adaptive
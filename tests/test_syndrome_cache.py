@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from surface_code_sim import syndrome_cache
+from surface_code_sim.cli import _sample, _sweep_configs
+from surface_code_sim.stim_backend import sample_syndromes_stim
+from surface_code_sim.syndrome_cache import SyndromeCache, syndrome_key
+from surface_code_sim.utils import ExperimentConfig, NoiseParams, RunOptions
+
+
+def _config(seed: int = 3, decoder: str = "mwpm") -> ExperimentConfig:
+    return ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=64,
+        noise=NoiseParams(model="depolarizing", p=0.02, readout_error=0.01),
+        decoder=decoder,
+        backend="stim",
+        seed=seed,
+    )
+
+
+def test_fetch_samples_once_and_reloads_read_only(tmp_path):
+    cache = SyndromeCache(tmp_path)
+    calls = []
+
+    def sample_fn(cfg):
+        calls.append(cfg)
+        return sample_syndromes_stim(cfg, packed=True)
+
+    first = cache.fetch(_config(decoder="mwpm"), sample_fn, packed=True)
+    second = cache.fetch(_config(decoder="local"), sample_fn, packed=True)
+    assert len(calls) == 1
+    assert isinstance(second.x_meas, np.memmap)
+    assert not second.x_meas.flags.writeable
+    assert second.packed and second.detector_count == first.detector_count
+    assert np.array_equal(first.detectors, second.detectors)
+    second.drop_measurements()
+    reloaded = cache.load(syndrome_key(_config(), packed=True, counts=False))
+    assert np.array_equal(reloaded.x_detection, first.x_detection)
+
+
+def test_store_evicts_least_recently_used_entries(tmp_path):
+    samples = {seed: sample_syndromes_stim(_config(seed)) for seed in range(3)}
+    probe = SyndromeCache(tmp_path / "probe")
+    probe.store("probe", samples[0])
+    entry_bytes = probe.size_bytes()
+    cache = SyndromeCache(tmp_path / "cache", max_bytes=2 * entry_bytes)
+    keys = {seed: syndrome_key(_config(seed), packed=False, counts=False) for seed in range(3)}
+    cache.store(keys[0], samples[0])
+    cache.store(keys[1], samples[1])
+    assert cache.load(keys[0]) is not None
+    cache.store(keys[2], samples[2])
+    assert cache.load(keys[1]) is None
+    assert cache.load(keys[0]) is not None
+    assert cache.size_bytes() <= 2 * entry_bytes
+
+
+def test_sweep_decoders_share_seeds_and_cached_samples(tmp_path):
+    configs = _sweep_configs(
+        distances=[3],
+        p_values=[0.01, 0.02],
+        backends=["stim"],
+        decoders=["local", "mwpm"],
+        rounds=2,
+        shots=16,
+        px=None,
+        py=None,
+        pz=None,
+        readout_error=0.0,
+        readout_error_0to1=None,
+        readout_error_1to0=None,
+        base_seed=5,
+    )
+    assert [cfg.seed for cfg in configs] == [5, 6, 5, 6]
+    options = RunOptions(syndrome_cache=str(tmp_path))
+    local = _sample(configs[0], options)
+    mwpm = _sample(configs[2], options)
+    assert np.array_equal(local.x_meas, mwpm.x_meas)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_cache_round_trips_native_detection_samples(tmp_path):
+    options = RunOptions(syndrome_cache=str(tmp_path), packed=True, stim_detectors=True)
+    first = _sample(_config(), options)
+    second = _sample(_config(decoder="local"), options)
+    assert second.x_meas is None
+    assert np.array_equal(first.x_detection, second.x_detection)
+    assert np.array_equal(first.detectors, second.detectors)
+
+
+def test_syndrome_key_changes_with_the_format_version(monkeypatch):
+    key = syndrome_key(_config(), packed=True, counts=False)
+    monkeypatch.setattr(syndrome_cache, "SYNDROME_FORMAT", syndrome_cache.SYNDROME_FORMAT + 1)
+    assert syndrome_key(_config(), packed=True, counts=False) != key
+
+
+def test_syndrome_cache_rejects_batched_aer_samples(tmp_path):
+    with pytest.raises(ValueError, match="syndrome_cache"):
+        RunOptions(aer_batch=True, syndrome_cache=str(tmp_path))
@@ -0,0 +1,91 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+from typer.testing import CliRunner
+
+from surface_code_sim.cli import _sample_detections, app, decode_file
+from surface_code_sim.decoders import MwpmDecoder
+from surface_code_sim.streaming import stream_failures
+from surface_code_sim.syndrome_file import SyndromeFile, write_syndrome_file
+from surface_code_sim.utils import ExperimentConfig, NoiseParams, RunOptions
+
+
+def _config() -> ExperimentConfig:
+    return ExperimentConfig(
+        distance=3,
+        rounds=2,
+        shots=90,
+        noise=NoiseParams(model="depolarizing", p=0.02, readout_error=0.01),
+        decoder="mwpm",
+        backend="stim",
+        seed=8,
+    )
+
+
+def test_syndrome_file_round_trips_chunks_as_read_only_views(tmp_path):
+    cfg = _config()
+    sample_fn = partial(_sample_detections, options=RunOptions(packed=True))
+    path = tmp_path / "s.bin"
+    write_syndrome_file(path, cfg, 40, sample_fn)
+    stored = SyndromeFile(path)
+    assert stored.config(decoder="mwpm") == cfg
+    chunks = list(stored.iter_chunks(25))
+    assert [c.shots for c in chunks] == [25, 25, 25, 15]
+    assert not chunks[0].x_detection.flags.writeable
+    assert np.shares_memory(chunks[1].detectors, stored.arrays["detectors"])
+    decoder = MwpmDecoder.from_config(cfg)
+    expected = stream_failures(cfg, decoder, 40, sample_fn, prefetch=False)
+    failures = sum(int(np.count_nonzero(decoder.decode(c)["x_logical"])) for c in chunks)
+    assert (failures, stored.shots) == expected
+
+
+def test_cli_sample_then_decode_writes_one_row_per_decoder(tmp_path):
+    path = tmp_path / "s.bin"
+    out = tmp_path / "runs.csv"
+    runner = CliRunner()
+    point = ["--rounds", "2", "--shots", "60", "--p", "0.01", "--backend", "stim"]
+    result = runner.invoke(app, ["sample", "--output", str(path), *point])
+    assert result.exit_code == 0, result.output
+    rows = decode_file(
+        path,
+        decoders=["local", "mwpm"],
+        output=out,
+        chunk_shots=16,
+        git_sha="abc",
+        run_prefix="dec",
+    )
+    assert [row["decoder"] for row in rows] == ["local", "mwpm"]
+    df = pd.read_csv(out)
+    assert list(df["shots"]) == [60, 60]
+
+
+def test_cli_decode_and_sweep_fingerprint_a_config_alike(tmp_path):
+    # Both commands default to the same git SHA, so resume and dedup work across them.
+    path = tmp_path / "s.bin"
+    point = ["--rounds", "2", "--shots", "60", "--p", "0.01", "--backend", "stim", "--seed", "4"]
+    runner = CliRunner()
+    result = runner.invoke(app, ["sample", "--output", str(path), *point])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(app, ["decode", str(path), "--output", str(tmp_path / "decoded.csv")])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(
+        app, ["sweep", "--decoder", "mwpm", "--output", str(tmp_path / "swept.csv"), *point]
+    )
+    assert result.exit_code == 0, result.output
+    decoded = pd.read_csv(tmp_path / "decoded.csv")
+    swept = pd.read_csv(tmp_path / "swept.csv")
+    assert list(decoded["config_fingerprint"]) == list(swept["config_fingerprint"])
+
+
+def test_cli_decode_rejects_local_decoder_for_native_detections(tmp_path):
+    path = tmp_path / "s.bin"
+    point = ["--rounds", "2", "--shots", "60", "--p", "0.01", "--stim-detectors"]
+    result = CliRunner().invoke(app, ["sample", "--output", str(path), *point])
+    assert result.exit_code == 0, result.output
+    assert SyndromeFile(path).header["stim_detectors"] is True
+    with pytest.raises(ValueError, match="mwpm"):
+        decode_file(path, decoders=["local"], output=tmp_path / "runs.csv", git_sha="abc")
+    rows = decode_file(path, decoders=["mwpm"], output=tmp_path / "runs.csv", git_sha="abc")
+    assert rows[0]["shots"] == 60